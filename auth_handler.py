@@ -1,106 +1,392 @@
+import atexit
+import copy
 import json
+import logging
 import os
+import random
+import threading
 import time
+import weakref
 import yaml
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from contextlib import contextmanager
+from functools import cached_property
 import lark_oapi as lark
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 from O365 import Account
-from lark_oapi.api.authen.v1 import *
-from lark_oapi.api.auth.v3 import *
+from lark_oapi.api.auth.v3 import InternalAppAccessTokenRequest, InternalAppAccessTokenRequestBody
 
 # Import our OAuth implementations
-from feishu_oauth import FeishuOAuth
+from feishu_oauth import FeishuOAuth, get_lark_client
+
+# Prefer the libyaml C bindings, fall back to the pure-Python implementation
+try:
+    from yaml import CSafeLoader as _LOADER, CSafeDumper as _DUMPER
+except ImportError:
+    from yaml import SafeLoader as _LOADER, SafeDumper as _DUMPER
+
+
+# orjson parses and emits bytes directly and is considerably faster when installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+# Parsed configs keyed by path, validated against (yaml mtime_ns, yaml size, json mtime_ns)
+_YAML_CACHE: "OrderedDict[str, Tuple[Tuple[int, int, int], Dict]]" = OrderedDict()
+_YAML_CACHE_SIZE = 16
+_YAML_CACHE_LOCK = threading.Lock()
+
+# (connect, read) timeout for Feishu HTTP calls
+_HTTP_TIMEOUT = (5, 15)
+
+# Refresh tokens this many seconds before they expire
+_REFRESH_AHEAD = 300
+
+# Live handlers, held weakly so the exit hook doesn't keep finished ones alive
+_HANDLERS: "weakref.WeakSet[AuthHandler]" = weakref.WeakSet()
+
+@atexit.register
+def _flush_handlers() -> None:
+    """Write pending configuration changes of every live handler at interpreter exit."""
+    for handler in list(_HANDLERS):
+        handler._flush_config()
+
+def _cache_config(path: str, key: Tuple[int, int, int], config: Dict) -> None:
+    """Remember a parsed config for the file state described by key."""
+    with _YAML_CACHE_LOCK:
+        _YAML_CACHE[path] = (key, copy.deepcopy(config))
+        _YAML_CACHE.move_to_end(path)
+        while len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+            _YAML_CACHE.popitem(last=False)
+
+logger = logging.getLogger(__name__)
+
+# Default configuration structure, deep-copied for new configs
+_DEFAULT_CONFIG = {
+    'feishu': {
+        'app_info': {
+            'app_id': None,
+            'app_secret': None
+        },
+        'tokens': {
+            'app_access_token': {
+                'token': None,
+                'expiration_time': None
+            },
+            'user_access_token': {
+                'token': None,
+                'refresh_token': None,
+                'expiration_time': None
+            }
+        }
+    },
+    'outlook': {
+        'app_info': {
+            'client_id': None,
+            'client_secret': None,
+            'tenant_id': None
+        },
+        'tokens': {
+            'access_token': None,
+            'refresh_token': None,
+            'expiration_time': None
+        },
+        'authenticated': False
+    },
+    'calendar_pairs': []  # Will store pairs of calendars
+}
 
 class AuthHandler:
+    # Treat tokens as expired this many seconds early so they are refreshed before use fails
+    TOKEN_EXPIRY_SKEW = 60
+    # Calendar metadata rarely changes, so lookups by ID are reused for an hour
+    CALENDAR_CACHE_TTL = 3600
+
     def __init__(self, yaml_file: str = 'tokens.yaml'):
         self.yaml_file = yaml_file
+        self.json_file = f"{yaml_file}.json"
+        self._dirty = False
+        self._yaml_dirty = False
+        self._batch_depth = 0
+        self._feishu_app_info_cache = None
+        self._outlook_app_info_cache = None
+        self._feishu_user_token_probed = False
+        self._feishu_valid_until = 0.0
+        self._saved_snapshot = None
+        self._loaded_key = None
+        self._lock = threading.RLock()
+        self._refresh_thread = None
+        self._calendar_cache: Dict[str, Tuple[object, float]] = {}
         self.config = self._load_config()
-        self._setup_clients()
+        self._cache_feishu_tokens()
+        self._client_credentials = (self.get_feishu_app_info(), self.get_outlook_app_info())
+        self._http = self._create_http_session()
+        _HANDLERS.add(self)
+
+    def _cache_feishu_tokens(self) -> None:
+        """Snapshot stored Feishu tokens and expirations for the getters."""
+        tokens = self.config['feishu']['tokens']
+        app_token = tokens.get('app_access_token') or {}
+        user_token = tokens.get('user_access_token') or {}
+        self._feishu_app_token = app_token.get('token')
+        self._feishu_app_expiry = app_token.get('expiration_time') or 0
+        self._feishu_user_token = user_token.get('token')
+        self._feishu_user_expiry = user_token.get('expiration_time') or 0
+        # Basic validation of token format: a simple length check
+        refresh_token = (user_token.get('refresh_token') or '').strip()
+        self._feishu_refresh_token = refresh_token if len(refresh_token) >= 10 else None
+        refresh_expiry = user_token.get('refresh_token_expiration_time') or 0
+        # Monotonic deadlines (skew included) for in-process checks, immune to wall-clock steps
+        offset = time.monotonic() - time.time()
+        self._feishu_app_deadline = (
+            self._feishu_app_expiry + offset - self.TOKEN_EXPIRY_SKEW if self._feishu_app_expiry else 0.0)
+        self._feishu_user_deadline = (
+            self._feishu_user_expiry + offset - self.TOKEN_EXPIRY_SKEW if self._feishu_user_expiry else 0.0)
+        self._feishu_refresh_deadline = refresh_expiry + offset if refresh_expiry else 0.0
+        self._feishu_user_auth_headers = (
+            {'Authorization': f"Bearer {self._feishu_user_token}"} if self._feishu_user_token else None
+        )
+
+    def _create_http_session(self) -> requests.Session:
+        """Create a pooled HTTP session so Feishu calls reuse TCP/TLS connections."""
+        session = requests.Session()
+        session.headers.update({'User-Agent': 'feishu-outlook-sync/1.0'})
+        # Only GETs are retried: token POSTs consume single-use codes and refresh tokens,
+        # so replaying one after a gateway error would fail and force a new OAuth flow
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                        allowed_methods=('GET',), raise_on_status=False)
+        session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+        return session
 
     def _setup_clients(self):
-        """Setup API clients if credentials exist."""
+        """Drop built API clients if the credentials they were built from changed."""
+        credentials = (self.get_feishu_app_info(), self.get_outlook_app_info())
+        if credentials == self._client_credentials:
+            return
+        self._client_credentials = credentials
+        for name in ('feishu_client', 'feishu_oauth', 'outlook_account', 'outlook_schedule'):
+            self.__dict__.pop(name, None)
+        self._calendar_cache.clear()
+
+    @cached_property
+    def feishu_client(self) -> Optional[lark.Client]:
+        """Lark API client, built on first use if credentials exist."""
         feishu_id, feishu_secret = self.get_feishu_app_info()
-        if feishu_id and feishu_secret:
-            self.feishu_client = lark.Client.builder() \
-                .app_id(feishu_id) \
-                .app_secret(feishu_secret) \
-                .enable_set_token(True) \
-                .log_level(lark.LogLevel.DEBUG) \
-                .build()
-            
-            # Initialize FeishuOAuth
-            self.feishu_oauth = FeishuOAuth(feishu_id, feishu_secret)
-        
+        if not (feishu_id and feishu_secret):
+            return None
+        return get_lark_client(feishu_id, feishu_secret)
+
+    @cached_property
+    def feishu_oauth(self) -> Optional[FeishuOAuth]:
+        """Feishu OAuth helper, built on first use if credentials exist."""
+        feishu_id, feishu_secret = self.get_feishu_app_info()
+        if not (feishu_id and feishu_secret):
+            return None
+        return FeishuOAuth(feishu_id, feishu_secret)
+
+    @cached_property
+    def outlook_account(self) -> Optional[Account]:
+        """O365 account, built on first use if credentials exist."""
         outlook_id, outlook_secret, tenant_id = self.get_outlook_app_info()
-        if outlook_id and outlook_secret:
-            self.outlook_account = Account(
-                (outlook_id, outlook_secret),
-                tenant_id=tenant_id,
-                scopes=['offline_access', 'calendar_all']  # Include offline_access for refresh tokens
-            )
-            
-            # Load existing token if available
-            self._load_outlook_token()
+        if not (outlook_id and outlook_secret):
+            return None
+        account = Account(
+            (outlook_id, outlook_secret),
+            tenant_id=tenant_id,
+            scopes=['offline_access', 'calendar_all']  # Include offline_access for refresh tokens
+        )
+        
+        # Load existing token if available
+        self._load_outlook_token(account)
+        return account
+
+    @cached_property
+    def outlook_schedule(self):
+        """O365 schedule of the Outlook account, built on first use."""
+        account = self.outlook_account
+        return account.schedule() if account else None
+
+    def _set_outlook_account(self, account: Account) -> None:
+        """Replace the O365 account, dropping the schedule and calendars bound to the old one."""
+        self.outlook_account = account
+        self.__dict__.pop('outlook_schedule', None)
+        self._calendar_cache.clear()
+
+    def get_outlook_calendar(self, calendar_id: str):
+        """Return an Outlook calendar by ID, cached for CALENDAR_CACHE_TTL seconds."""
+        now = time.monotonic()
+        cached = self._calendar_cache.get(calendar_id)
+        if cached and now - cached[1] < self.CALENDAR_CACHE_TTL:
+            return cached[0]
+
+        calendar = self.outlook_schedule.get_calendar(calendar_id)
+        if calendar:
+            self._calendar_cache[calendar_id] = (calendar, now)
+        return calendar
 
     def _load_config(self) -> Dict:
-        """Load configuration from YAML file."""
+        """Load configuration, preferring the JSON sidecar and reusing cached parses."""
         try:
-            with open(self.yaml_file, 'r') as file:
-                return yaml.safe_load(file) or self._get_default_config()
+            stat = os.stat(self.yaml_file)
         except FileNotFoundError:
             return self._get_default_config()
 
+        path = os.path.abspath(self.yaml_file)
+        key = self._config_cache_key(stat)
+        with _YAML_CACHE_LOCK:
+            cached = _YAML_CACHE.get(path)
+            if cached and cached[0] == key:
+                _YAML_CACHE.move_to_end(path)
+                config = copy.deepcopy(cached[1])
+                self._saved_snapshot = self._config_snapshot(config)
+                self._loaded_key = key
+                return config
+
+        sidecar = self._load_json_sidecar()
+        if sidecar is not None and os.path.getmtime(self.json_file) >= stat.st_mtime:
+            config = sidecar
+        else:
+            try:
+                with open(self.yaml_file, 'r') as file:
+                    config = yaml.load(file, Loader=_LOADER)
+            except FileNotFoundError:
+                return self._get_default_config()
+            if not config:
+                return self._get_default_config()
+            # Tokens are only persisted to the sidecar, so keep them across YAML edits
+            if sidecar is not None:
+                for service in ('feishu', 'outlook'):
+                    if service in config and 'tokens' in sidecar.get(service, {}):
+                        config[service]['tokens'] = sidecar[service]['tokens']
+            self._write_json_sidecar(config)
+            key = self._config_cache_key(stat)
+
+        _cache_config(path, key, config)
+        self._saved_snapshot = self._config_snapshot(config)
+        self._loaded_key = key
+        return config
+
+    def reload_if_changed(self) -> bool:
+        """Reload configuration if another process changed it on disk."""
+        with self._lock:
+            try:
+                key = self._config_cache_key(os.stat(self.yaml_file))
+            except FileNotFoundError:
+                return False
+            if key == self._loaded_key or self._dirty:
+                return False
+            self.config = self._load_config()
+            self._feishu_app_info_cache = self._outlook_app_info_cache = None
+            self._cache_feishu_tokens()
+            self._setup_clients()
+            return True
+
+    def _config_cache_key(self, yaml_stat: os.stat_result) -> Tuple[int, int, int]:
+        """Identify the on-disk state of the YAML file and its JSON sidecar."""
+        try:
+            json_mtime = os.stat(self.json_file).st_mtime_ns
+        except OSError:
+            json_mtime = 0
+        return (yaml_stat.st_mtime_ns, yaml_stat.st_size, json_mtime)
+
+    def _load_json_sidecar(self) -> Optional[Dict]:
+        """Load the JSON copy of the config, or None if missing or unreadable."""
+        try:
+            with open(self.json_file, 'rb') as file:
+                return _json_loads(file.read()) or None
+        except (OSError, ValueError):
+            return None
+
+    def _write_json_sidecar(self, config: Dict) -> bool:
+        """Write a JSON copy of the config so later loads can skip YAML parsing."""
+        tmp_file = f"{self.json_file}.tmp"
+        try:
+            with open(tmp_file, 'wb') as file:
+                file.write(_json_dumps(config))
+            os.replace(tmp_file, self.json_file)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Failed to write config cache {self.json_file}: {e}")
+            return False
+
     def _get_default_config(self) -> Dict:
         """Get default configuration structure."""
-        return {
-            'feishu': {
-                'app_info': {
-                    'app_id': None,
-                    'app_secret': None
-                },
-                'tokens': {
-                    'app_access_token': {
-                        'token': None,
-                        'expiration_time': None
-                    },
-                    'user_access_token': {
-                        'token': None,
-                        'refresh_token': None,
-                        'expiration_time': None
-                    }
-                }
-            },
-            'outlook': {
-                'app_info': {
-                    'client_id': None,
-                    'client_secret': None,
-                    'tenant_id': None
-                },
-                'tokens': {
-                    'access_token': None,
-                    'refresh_token': None,
-                    'expiration_time': None
-                },
-                'authenticated': False
-            },
-            'calendar_pairs': []  # Will store pairs of calendars
-        }
+        return copy.deepcopy(_DEFAULT_CONFIG)
 
+    @staticmethod
+    def _config_snapshot(config: Dict) -> str:
+        """Canonical serialization used to detect unchanged configs."""
+        return json.dumps(config, sort_keys=True, default=str)
 
     def _save_config(self) -> None:
-        """Save configuration to YAML file."""
-        with open(self.yaml_file, 'w') as file:
-            yaml.dump(self.config, file, default_flow_style=False)
+        """Save configuration to the JSON sidecar, and to YAML when settings changed."""
+        snapshot = self._config_snapshot(self.config)
+        if snapshot == self._saved_snapshot:
+            self._dirty = self._yaml_dirty = False
+            return
+
+        if self._yaml_dirty:
+            self._write_yaml()
+            self._write_json_sidecar(self.config)
+        elif not self._write_json_sidecar(self.config):
+            self._write_yaml()
+        self._dirty = self._yaml_dirty = False
+        self._saved_snapshot = snapshot
+        self._loaded_key = self._config_cache_key(os.stat(self.yaml_file))
+        _cache_config(os.path.abspath(self.yaml_file), self._loaded_key, self.config)
+
+    def _write_yaml(self) -> None:
+        """Write the configuration to the YAML file."""
+        tmp_file = f"{self.yaml_file}.tmp"
+        with open(tmp_file, 'w') as file:
+            yaml.dump(self.config, file, Dumper=_DUMPER, default_flow_style=False, sort_keys=False)
+        os.replace(tmp_file, self.yaml_file)
+
+    def _mark_dirty(self, write_yaml: bool = True) -> None:
+        """Flag configuration as modified, saving it unless a batch is open.
+
+        Token updates pass write_yaml=False and only rewrite the JSON sidecar.
+        """
+        self._dirty = True
+        self._yaml_dirty = self._yaml_dirty or write_yaml or not os.path.exists(self.yaml_file)
+        if self._batch_depth == 0:
+            self._save_config()
+
+    def _flush_config(self) -> None:
+        """Write any pending configuration changes, e.g. at interpreter exit."""
+        if self._dirty:
+            self._save_config()
+
+    @contextmanager
+    def batch_save(self):
+        """Coalesce configuration writes made inside the block into one save."""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self._save_config()
 
     # Feishu Token Management
     def refresh_feishu_app_token(self) -> bool:
         """Refresh Feishu app token."""
+        app_id, app_secret = self.get_feishu_app_info()
         request = InternalAppAccessTokenRequest.builder() \
             .request_body(InternalAppAccessTokenRequestBody.builder()
-                       .app_id(self.get_feishu_app_info()[0])
-                       .app_secret(self.get_feishu_app_info()[1])
+                       .app_id(app_id)
+                       .app_secret(app_secret)
                        .build()) \
             .build()
 
@@ -108,7 +394,7 @@ class AuthHandler:
         if not response.success():
             return False
 
-        response_data = json.loads(response.raw.content.decode('utf-8'))
+        response_data = _json_loads(response.raw.content)
         token = response_data.get('app_access_token')
         expire = response_data.get('expire')
         
@@ -119,118 +405,210 @@ class AuthHandler:
 
     def refresh_feishu_user_token(self) -> bool:
         """Refresh Feishu user token using refresh token."""
-        try:
-            refresh_token = self.get_feishu_refresh_token()
-            if not refresh_token:
-                print("No refresh token available")
-                return False
+        with self._lock, self.batch_save():
+            # Another caller may have refreshed while we waited for the lock
+            if self._feishu_user_token and self._feishu_user_deadline - time.monotonic() > _REFRESH_AHEAD:
+                return True
 
-            # Get app credentials
-            app_id, app_secret = self.get_feishu_app_info()
-            if not app_id or not app_secret:
-                print("Missing app credentials")
-                return False
+            try:
+                refresh_token = self.get_feishu_refresh_token()
+                if not refresh_token:
+                    print("No refresh token available")
+                    return False
 
-            # Prepare request
-            url = 'https://open.feishu.cn/open-apis/authen/v2/oauth/token'
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            payload = {
-                'grant_type': 'refresh_token',
-                'client_id': app_id,
-                'client_secret': app_secret,
-                'refresh_token': refresh_token
-            }
+                # Get app credentials
+                app_id, app_secret = self.get_feishu_app_info()
+                if not app_id or not app_secret:
+                    print("Missing app credentials")
+                    return False
+
+                # Prepare request
+                url = 'https://open.feishu.cn/open-apis/authen/v2/oauth/token'
+                headers = {
+                    'Content-Type': 'application/json'
+                }
+                payload = {
+                    'grant_type': 'refresh_token',
+                    'client_id': app_id,
+                    'client_secret': app_secret,
+                    'refresh_token': refresh_token
+                }
 
-            print("\nDebug Info:")
-            print(f"URL: {url}")
-            print(f"Headers: {headers}")
-            print(f"Payload: {json.dumps({**payload, 'client_secret': '***', 'refresh_token': '***'}, indent=2)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Refresh request: URL=%s Headers=%s Payload=%s", url, headers,
+                                 json.dumps({**payload, 'client_secret': '***', 'refresh_token': '***'}, indent=2))
 
-            # Make request to refresh token
-            response = requests.post(url, headers=headers, json=payload)
+                # Make request to refresh token
+                response = self._http.post(url, headers=headers, data=_json_dumps(payload), timeout=_HTTP_TIMEOUT)
             
-            if response.status_code != 200:
-                print(f"\nError Response Status: {response.status_code}")
-                try:
-                    error_data = response.json()
-                    print(f"Error Response Body: {json.dumps(error_data, indent=2)}")
-                except:
-                    print(f"Error Response Text: {response.text}")
-                return False
+                if response.status_code != 200:
+                    print(f"\nError Response Status: {response.status_code}")
+                    try:
+                        error_data = _json_loads(response.content)
+                        print(f"Error Response Body: {json.dumps(error_data, indent=2)}")
+                    except:
+                        print(f"Error Response Text: {response.text}")
+                    return False
 
-            # Parse response
-            response_data = response.json()
-            if response_data.get('code') != 0:
-                print(f"Error in response: {json.dumps(response_data, indent=2)}")
-                return False
+                # Parse response
+                response_data = _json_loads(response.content)
+                if response_data.get('code') != 0:
+                    print(f"Error in response: {json.dumps(response_data, indent=2)}")
+                    return False
 
-            # Extract token data
-            access_token = response_data.get('access_token')
-            new_refresh_token = response_data.get('refresh_token')
-            access_token_expires_in = response_data.get('expires_in')
-            refresh_token_expires_in = response_data.get('refresh_token_expires_in')
-
-            # Use existing set_feishu_user_token method with updated structure
-            self.set_feishu_user_token(
-                token=access_token,
-                refresh_token=new_refresh_token,
-                expires_in=access_token_expires_in,
-                refresh_expires_in=refresh_token_expires_in
-            )
+                # Extract token data
+                access_token = response_data.get('access_token')
+                new_refresh_token = response_data.get('refresh_token')
+                access_token_expires_in = response_data.get('expires_in')
+                refresh_token_expires_in = response_data.get('refresh_token_expires_in')
+
+                # Use existing set_feishu_user_token method with updated structure
+                self.set_feishu_user_token(
+                    token=access_token,
+                    refresh_token=new_refresh_token,
+                    expires_in=access_token_expires_in,
+                    refresh_expires_in=refresh_token_expires_in
+                )
 
-            print("Successfully refreshed Feishu tokens")
-            return True
+                print("Successfully refreshed Feishu tokens")
+                return True
 
-        except Exception as e:
-            print(f"Error refreshing user token: {e}")
-            return False
+            except Exception as e:
+                print(f"Error refreshing user token: {e}")
+                return False
 
     def verify_feishu_tokens(self) -> bool:
         """Verify and refresh Feishu tokens if needed."""
-        try:
-            app_valid = self.is_feishu_app_token_valid()
-            user_valid = self.is_feishu_user_token_valid()
+        # Reuse a recent verdict, then check the stored expirations without locking
+        if time.monotonic() < self._feishu_valid_until:
+            return True
+        now = time.monotonic()
+        if (self._feishu_app_token and self._feishu_user_token
+                and now < self._feishu_app_deadline and now < self._feishu_user_deadline):
+            self._cache_feishu_verdict(now)
+            return True
 
-            # Try to refresh app token if needed
-            if not app_valid:
-                print("Refreshing Feishu app token...")
-                app_valid = self.refresh_feishu_app_token()
-                if not app_valid:
-                    print("Failed to refresh app token")
-                    return False
+        with self._lock:
+            try:
+                app_valid = self.is_feishu_app_token_valid(now)
+                user_valid = self.is_feishu_user_token_valid(now)
 
-            # Try to refresh user token if needed
-            if not user_valid:
-                refresh_token = self.get_feishu_refresh_token()
-                if refresh_token:
-                    print("Attempting to refresh Feishu user token...")
-                    if self.refresh_feishu_user_token():
-                        print("Successfully refreshed Feishu user token")
-                        user_valid = True
-                    else:
-                        print("Failed to refresh user token - clearing stored tokens")
-                        # Clear invalid tokens
-                        self.clear_feishu_user_tokens()
-                else:
-                    print("No valid refresh token available for Feishu")
+                # Only ask the API about a token that has no stored expiry to judge it by
+                if not user_valid and self._feishu_user_token and not self._feishu_user_expiry:
+                    user_valid = self._feishu_user_token_probed or self._probe_feishu_user_token()
+
+                # Try to refresh app token if needed
+                if not app_valid:
+                    print("Refreshing Feishu app token...")
+                    app_valid = self.refresh_feishu_app_token()
+                    if not app_valid:
+                        print("Failed to refresh app token")
+                        return False
 
-                # Only if refresh token doesn't exist or refresh failed, do full reauth
+                # Try to refresh user token if needed
                 if not user_valid:
-                    print("\nFull Feishu authentication required...")
-                    oauth_code = self.feishu_oauth.obtain_oauth_code()
-                    if oauth_code:
-                        user_valid = self.get_feishu_user_token_from_code(oauth_code)
+                    refresh_token = self.get_feishu_refresh_token()
+                    if refresh_token:
+                        print("Attempting to refresh Feishu user token...")
+                        if self.refresh_feishu_user_token():
+                            print("Successfully refreshed Feishu user token")
+                            user_valid = True
+                        else:
+                            print("Failed to refresh user token - clearing stored tokens")
+                            # Clear invalid tokens
+                            self.clear_feishu_user_tokens()
                     else:
-                        print("Failed to obtain Feishu OAuth code")
-                        return False
+                        print("No valid refresh token available for Feishu")
+
+                    # Only if refresh token doesn't exist or refresh failed, do full reauth
+                    if not user_valid:
+                        print("\nFull Feishu authentication required...")
+                        oauth_code = self.feishu_oauth.obtain_oauth_code()
+                        if oauth_code:
+                            user_valid = self.get_feishu_user_token_from_code(oauth_code)
+                        else:
+                            print("Failed to obtain Feishu OAuth code")
+                            return False
+
+                if app_valid and user_valid:
+                    self._cache_feishu_verdict(time.monotonic())
+                return app_valid and user_valid
 
-            return app_valid and user_valid
+            except Exception as e:
+                print(f"Error verifying Feishu tokens: {e}")
+                return False
 
-        except Exception as e:
-            print(f"Error verifying Feishu tokens: {e}")
-            return False
+    def _cache_feishu_verdict(self, now: float) -> None:
+        """Skip Feishu verification for up to 60s while both tokens stay valid."""
+        remaining = min(self._feishu_app_deadline, self._feishu_user_deadline or now + 60) - now
+        self._feishu_valid_until = now + max(0, min(remaining, 60))
+
+    def invalidate_feishu_user_token(self) -> None:
+        """Forget the cached verdict after the API rejected the user token."""
+        self._feishu_valid_until = 0.0
+        self._feishu_user_expiry = 0
+        self._feishu_user_deadline = 0.0
+        self._feishu_user_token_probed = False
+
+    def start_background_refresh(self) -> None:
+        """Start a daemon thread that refreshes tokens shortly before they expire."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, name=f"token-refresh-{self.yaml_file}", daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_deadlines(self) -> Dict[str, float]:
+        """Monotonic deadlines of the tokens that can be refreshed without user interaction."""
+        now = time.monotonic()
+        deadlines = {}
+        if self._feishu_app_deadline and self.feishu_client:
+            deadlines['feishu_app'] = self._feishu_app_deadline
+        if (self._feishu_user_deadline and self._feishu_refresh_token
+                and not (self._feishu_refresh_deadline and now >= self._feishu_refresh_deadline)):
+            deadlines['feishu_user'] = self._feishu_user_deadline
+        outlook_tokens = self.config['outlook']['tokens']
+        if outlook_tokens.get('expiration_time') and outlook_tokens.get('refresh_token') and self.outlook_account:
+            deadlines['outlook'] = (outlook_tokens['expiration_time'] + now - time.time()
+                                    - self.TOKEN_EXPIRY_SKEW)
+        return deadlines
+
+    def _refresh_loop(self) -> None:
+        """Sleep until the next token is about to expire, then refresh it, backing off while refreshes fail."""
+        failures = 0
+        while True:
+            deadlines = self._refresh_deadlines()
+            # Jitter the refresh lead so handlers sharing a schedule don't refresh in lockstep;
+            # the same lead decides what is due after waking
+            lead = _REFRESH_AHEAD + random.uniform(0, 60)
+            if failures:
+                # Don't hammer the token endpoints while they fail or a refresh token is revoked
+                delay = 30 * 2 ** failures
+            elif deadlines:
+                delay = min(deadlines.values()) - lead - time.monotonic()
+            else:
+                delay = 3600
+            time.sleep(min(max(delay, 30), 3600))
+            try:
+                refreshed = self._refresh_expiring_tokens(lead)
+            except Exception as e:
+                print(f"Background token refresh failed: {e}")
+                refreshed = False
+            failures = 0 if refreshed else min(failures + 1, 7)
+
+    def _refresh_expiring_tokens(self, lead: float = _REFRESH_AHEAD) -> bool:
+        """Refresh any token within lead seconds of expiry; False if a refresh failed."""
+        with self._lock, self.batch_save():
+            deadlines = self._refresh_deadlines()
+            due = time.monotonic() + lead
+            refreshed = True
+            if deadlines.get('feishu_app', due + 1) <= due:
+                refreshed = self.refresh_feishu_app_token() and refreshed
+            if deadlines.get('feishu_user', due + 1) <= due:
+                refreshed = self.refresh_feishu_user_token() and refreshed
+            if deadlines.get('outlook', due + 1) <= due:
+                refreshed = self.refresh_outlook_token() and refreshed
+            return refreshed
 
     def clear_feishu_user_tokens(self) -> None:
         """Clear stored Feishu user tokens when they're invalid."""
@@ -240,14 +618,21 @@ class AuthHandler:
             'expiration_time': None,
             'refresh_token_expiration_time': None
         }
-        self._save_config()
+        self._cache_feishu_tokens()
+        self._feishu_user_token_probed = False
+        self._feishu_valid_until = 0.0
+        self._mark_dirty(write_yaml=False)
 
     # Outlook Token Management
-    def _load_outlook_token(self):
+    def _load_outlook_token(self, account: Account):
         """Load token for Outlook if exists."""
-        access_token, refresh_token, expiration = self.get_outlook_token()
+        # Load expired tokens too, so O365 can still use the refresh token
+        token_data = self.config['outlook']['tokens']
+        access_token = token_data.get('access_token')
+        refresh_token = token_data.get('refresh_token')
+        expiration = token_data.get('expiration_time')
         if access_token and refresh_token:
-            self.outlook_account.connection.token_backend.token = {
+            account.connection.token_backend.token = {
                 'token_type': 'Bearer',
                 'access_token': access_token,
                 'refresh_token': refresh_token,
@@ -256,159 +641,164 @@ class AuthHandler:
 
     def refresh_outlook_token(self) -> bool:
         """Refresh Outlook token."""
-        try:
-            token_dict = self.outlook_account.connection.token_backend.token
-            if token_dict and 'refresh_token' in token_dict:
-                result = self.outlook_account.connection.refresh_token()
-                if result:
-                    # Save the new tokens
-                    new_token = self.outlook_account.connection.token_backend.token
-                    self.set_outlook_token(
-                        new_token['access_token'],
-                        new_token['refresh_token'],
-                        3600  # Standard expiration
-                    )
-                    return True
-        except Exception as e:
-            print(f"Failed to refresh Outlook token: {e}")
-        return False
-
-    def verify_outlook_token(self) -> bool:
-        """Verify and refresh Outlook token if needed."""
-        try:
-            # First check if we have a valid token
-            if self.outlook_account.is_authenticated:
-                return True
-
-            # Check if we have a refresh token to use
-            token_dict = self.outlook_account.connection.token_backend.token
-            if token_dict and token_dict.get('refresh_token'):
-                try:
-                    print("Attempting to refresh Outlook token...")
+        with self._lock:
+            try:
+                token_dict = self.outlook_account.connection.token_backend.token
+                if token_dict and 'refresh_token' in token_dict:
                     result = self.outlook_account.connection.refresh_token()
                     if result:
                         # Save the new tokens
                         new_token = self.outlook_account.connection.token_backend.token
                         self.set_outlook_token(
                             new_token['access_token'],
-                            new_token.get('refresh_token', ''),
-                            3600
+                            new_token['refresh_token'],
+                            3600  # Standard expiration
                         )
-                        print("Successfully refreshed Outlook token")
                         return True
-                    else:
-                        print("Token refresh failed")
-                except Exception as e:
-                    print(f"Error during token refresh: {e}")
+            except Exception as e:
+                print(f"Failed to refresh Outlook token: {e}")
+            return False
 
-            # Only do full reauth if refresh failed or no refresh token
-            print("\nFull Outlook authentication required...")
+    def verify_outlook_token(self) -> bool:
+        """Verify and refresh Outlook token if needed."""
+        with self._lock:
+            with self.batch_save():
+                try:
+                    # Trust the stored expiry while it is outside the skew window
+                    now = time.time()
+                    expiration = self.config['outlook']['tokens'].get('expiration_time')
+                    if expiration:
+                        if now < expiration - self.TOKEN_EXPIRY_SKEW:
+                            return True
+                    elif self.outlook_account.is_authenticated:
+                        return True
+
+                    # Check if we have a refresh token to use, refreshing ahead of expiry
+                    token_dict = self.outlook_account.connection.token_backend.token
+                    if token_dict and token_dict.get('refresh_token'):
+                        try:
+                            print("Attempting to refresh Outlook token...")
+                            result = self.outlook_account.connection.refresh_token()
+                            if result:
+                                # Save the new tokens
+                                new_token = self.outlook_account.connection.token_backend.token
+                                self.set_outlook_token(
+                                    new_token['access_token'],
+                                    new_token.get('refresh_token', ''),
+                                    3600
+                                )
+                                print("Successfully refreshed Outlook token")
+                                return True
+                            else:
+                                print("Token refresh failed")
+                        except Exception as e:
+                            print(f"Error during token refresh: {e}")
+
+                    # An early refresh may fail transiently; keep using the token until it expires
+                    if expiration and now < expiration:
+                        return True
+
+                    # Only do full reauth if refresh failed or no refresh token
+                    print("\nFull Outlook authentication required...")
             
-            # Get credentials from config
-            client_id, client_secret, tenant_id = self.get_outlook_app_info()
+                    # Get credentials from config
+                    client_id, client_secret, tenant_id = self.get_outlook_app_info()
             
-            # Reinitialize account with proper credentials
-            self.outlook_account = Account(
-                (client_id, client_secret),
-                tenant_id=tenant_id,
-                scopes=['offline_access', 'Calendars.ReadWrite']
-            )
+                    # Reinitialize account with proper credentials
+                    self._set_outlook_account(Account(
+                        (client_id, client_secret),
+                        tenant_id=tenant_id,
+                        scopes=['offline_access', 'Calendars.ReadWrite']
+                    ))
             
-            result = self.outlook_account.authenticate()
+                    result = self.outlook_account.authenticate()
             
-            if result:
-                token = self.outlook_account.connection.token_backend.token
-                self.set_outlook_token(
-                    token['access_token'],
-                    token.get('refresh_token', ''),
-                    3600
-                )
-                self.set_outlook_authenticated(True)
-                return True
+                    if result:
+                        token = self.outlook_account.connection.token_backend.token
+                        self.set_outlook_token(
+                            token['access_token'],
+                            token.get('refresh_token', ''),
+                            3600
+                        )
+                        self.set_outlook_authenticated(True)
+                        return True
             
-            print("Outlook authentication failed")
-            return False
+                    print("Outlook authentication failed")
+                    return False
                 
-        except Exception as e:
-            print(f"Error verifying Outlook token: {e}")
-            return False
+                except Exception as e:
+                    print(f"Error verifying Outlook token: {e}")
+                    return False
 
     # Setup Methods
     def setup_feishu(self, app_id: str, app_secret: str) -> bool:
         """Initial Feishu setup."""
-        try:
-            print("\nInitializing Feishu setup...")
-            self.set_feishu_app_info(app_id, app_secret)
-            self._setup_clients()
+        with self.batch_save():
+            try:
+                print("\nInitializing Feishu setup...")
+                self.set_feishu_app_info(app_id, app_secret)
+                self._setup_clients()
             
-            # Get initial app token
-            print("Getting app token...")
-            if not self.refresh_feishu_app_token():
-                print("Failed to get app token")
-                return False
+                # Get initial app token
+                print("Getting app token...")
+                if not self.refresh_feishu_app_token():
+                    print("Failed to get app token")
+                    return False
                 
-            # Get user token through OAuth
-            print("Starting OAuth process...")
-            oauth_code = self.feishu_oauth.obtain_oauth_code()
-            if not oauth_code:
-                print("Failed to get OAuth code")
-                return False
+                # Get user token through OAuth
+                print("Starting OAuth process...")
+                oauth_code = self.feishu_oauth.obtain_oauth_code()
+                if not oauth_code:
+                    print("Failed to get OAuth code")
+                    return False
 
-            print(f"Got OAuth code: {oauth_code}")
+                print(f"Got OAuth code: {oauth_code}")
             
-            # Get user token
-            print("Getting user token...")
-            if not self.get_feishu_user_token_from_code(oauth_code):
-                print("Failed to get user token")
-                return False
+                # Get user token
+                print("Getting user token...")
+                if not self.get_feishu_user_token_from_code(oauth_code):
+                    print("Failed to get user token")
+                    return False
 
-            # List calendars
-            print("Fetching calendars...")
-            calendars = self.list_feishu_calendars()
-            if not calendars:
-                print("No calendars found")
-                return False
+                # List calendars
+                print("Fetching calendars...")
+                calendars = self._normalize_feishu_calendars(self.list_feishu_calendars())
+                if not calendars:
+                    print("No calendars found")
+                    return False
 
-            print("\nAvailable Feishu Calendars:")
-            for i, cal in enumerate(calendars, 1):
-                name = cal.get('calendar', {}).get('summary') or cal.get('summary', 'Unnamed Calendar')
-                description = cal.get('calendar', {}).get('description') or cal.get('description', 'No description')
-                print(f"{i}. {name} ({description})")
+                print("\nAvailable Feishu Calendars:")
+                for i, cal in enumerate(calendars, 1):
+                    print(f"{i}. {cal['name']} ({cal['description']})")
             
-            selections = input("\nEnter calendar numbers to sync (comma-separated) or 'all': ").strip()
-            selected_calendars = {}
+                selections = input("\nEnter calendar numbers to sync (comma-separated) or 'all': ").strip()
+                selected_calendars = {}
             
-            if selections.lower() == 'all':
-                for cal in calendars:
-                    cal_id = cal.get('calendar', {}).get('calendar_id') or cal.get('calendar_id')
-                    name = cal.get('calendar', {}).get('summary') or cal.get('summary', 'Unnamed Calendar')
-                    if cal_id:
-                        selected_calendars[cal_id] = name
-            else:
-                try:
-                    indices = [int(i)-1 for i in selections.split(',')]
-                    for idx in indices:
-                        cal = calendars[idx]
-                        cal_id = cal.get('calendar', {}).get('calendar_id') or cal.get('calendar_id')
-                        name = cal.get('calendar', {}).get('summary') or cal.get('summary', 'Unnamed Calendar')
-                        if cal_id:
-                            selected_calendars[cal_id] = name
-                except (ValueError, IndexError):
-                    print("Invalid selection")
-                    return False
+                if selections.lower() == 'all':
+                    for cal in calendars:
+                        selected_calendars[cal['id']] = cal['name']
+                else:
+                    try:
+                        indices = [int(i)-1 for i in selections.split(',')]
+                        for idx in indices:
+                            cal = calendars[idx]
+                            selected_calendars[cal['id']] = cal['name']
+                    except (ValueError, IndexError):
+                        print("Invalid selection")
+                        return False
 
-            if not selected_calendars:
-                print("No calendars selected")
-                return False
+                if not selected_calendars:
+                    print("No calendars selected")
+                    return False
 
-            print(f"\nSelected {len(selected_calendars)} calendars")
-            self.config['feishu']['calendars'] = selected_calendars
-            self._save_config()
-            return True
+                print(f"\nSelected {len(selected_calendars)} calendars")
+                self.config['feishu']['calendars'] = selected_calendars
+                self._mark_dirty()
+                return True
 
-        except Exception as e:
-            print(f"Setup failed with error: {e}")
-            return False
+            except Exception as e:
+                print(f"Setup failed with error: {e}")
+                return False
 
     def setup_outlook(self, client_id: str, client_secret: str, tenant_id: str) -> bool:
         """Initial Outlook setup."""
@@ -419,11 +809,11 @@ class AuthHandler:
             self.set_outlook_app_info(client_id, client_secret, tenant_id)
             
             # Initialize the account with the provided credentials
-            self.outlook_account = Account(
+            self._set_outlook_account(Account(
                 (client_id, client_secret),
                 tenant_id=tenant_id,
                 scopes=['offline_access', 'Calendars.ReadWrite']
-            )
+            ))
             
             # Authenticate with Outlook
             print("\nStarting Outlook authentication...")
@@ -440,71 +830,72 @@ class AuthHandler:
     
     def authenticate_outlook(self) -> bool:
         """Authenticate Outlook using built-in O365 authentication."""
-        try:
-            # First check if current token is valid
-            if self.outlook_account.is_authenticated:
-                return True
+        with self.batch_save():
+            try:
+                # First check if current token is valid
+                if self.outlook_account.is_authenticated:
+                    return True
 
-            # Get credentials from config
-            client_id, client_secret, tenant_id = self.get_outlook_app_info()
+                # Get credentials from config
+                client_id, client_secret, tenant_id = self.get_outlook_app_info()
+            
+                # Check if we have a refresh token to use
+                token_dict = self.outlook_account.connection.token_backend.token
+                if token_dict and 'refresh_token' in token_dict:
+                    try:
+                        # Attempt to refresh the token
+                        print("Attempting to refresh Outlook token...")
+                        result = self.outlook_account.connection.refresh_token()
+                        if result:
+                            # Save the new tokens
+                            new_token = self.outlook_account.connection.token_backend.token
+                            self.set_outlook_token(
+                                new_token['access_token'],
+                                new_token.get('refresh_token', ''),
+                                3600
+                            )
+                            print("Successfully refreshed Outlook token")
+                            return True
+                    except Exception as e:
+                        print(f"Token refresh failed: {e}")
+
+                # If we get here, we need a full authentication
+                print("\nFull authentication required. Please sign in to your Outlook account in the browser window...")
             
-            # Check if we have a refresh token to use
-            token_dict = self.outlook_account.connection.token_backend.token
-            if token_dict and 'refresh_token' in token_dict:
                 try:
-                    # Attempt to refresh the token
-                    print("Attempting to refresh Outlook token...")
-                    result = self.outlook_account.connection.refresh_token()
+                    # Create a new account instance with the stored credentials
+                    self._set_outlook_account(Account(
+                        (client_id, client_secret),
+                        tenant_id=tenant_id,
+                        scopes=['offline_access', 'Calendars.ReadWrite']
+                    ))
+                
+                    result = self.outlook_account.authenticate()
+                
                     if result:
-                        # Save the new tokens
-                        new_token = self.outlook_account.connection.token_backend.token
+                        # Save both access and refresh tokens
+                        token = self.outlook_account.connection.token_backend.token
+                        if 'refresh_token' not in token:
+                            print("Warning: No refresh token received. Token will expire in 1 hour.")
+                        
                         self.set_outlook_token(
-                            new_token['access_token'],
-                            new_token.get('refresh_token', ''),
+                            token['access_token'],
+                            token.get('refresh_token', ''),
                             3600
                         )
-                        print("Successfully refreshed Outlook token")
+                        self.set_outlook_authenticated(True)
                         return True
-                except Exception as e:
-                    print(f"Token refresh failed: {e}")
-
-            # If we get here, we need a full authentication
-            print("\nFull authentication required. Please sign in to your Outlook account in the browser window...")
-            
-            try:
-                # Create a new account instance with the stored credentials
-                self.outlook_account = Account(
-                    (client_id, client_secret),
-                    tenant_id=tenant_id,
-                    scopes=['offline_access', 'Calendars.ReadWrite']
-                )
                 
-                result = self.outlook_account.authenticate()
-                
-                if result:
-                    # Save both access and refresh tokens
-                    token = self.outlook_account.connection.token_backend.token
-                    if 'refresh_token' not in token:
-                        print("Warning: No refresh token received. Token will expire in 1 hour.")
-                        
-                    self.set_outlook_token(
-                        token['access_token'],
-                        token.get('refresh_token', ''),
-                        3600
-                    )
-                    self.set_outlook_authenticated(True)
-                    return True
+                    print("Authentication failed")
+                    return False
                 
-                print("Authentication failed")
-                return False
+                except Exception as e:
+                    print(f"Error during authentication: {e}")
+                    return False
                 
             except Exception as e:
-                print(f"Error during authentication: {e}")
+                print(f"Outlook authentication error: {e}")
                 return False
-                
-        except Exception as e:
-            print(f"Outlook authentication error: {e}")
-            return False
     
     def list_outlook_calendars(self) -> List[Dict]:
         """List all available Outlook calendars."""
@@ -513,7 +904,7 @@ class AuthHandler:
                 print("Failed to verify Outlook token")
                 return []
 
-            schedule = self.outlook_account.schedule()
+            schedule = self.outlook_schedule
             calendars = []
             
             # Get default calendar
@@ -540,6 +931,21 @@ class AuthHandler:
             print(f"Error listing Outlook calendars: {e}")
             return []
 
+    @staticmethod
+    def _normalize_feishu_calendars(calendars: List[Dict]) -> List[Dict]:
+        """Flatten Feishu calendar entries to id/name/description, dropping ones without an id."""
+        normalized = []
+        for cal in calendars:
+            inner = cal.get('calendar') or cal
+            cal_id = inner.get('calendar_id')
+            if cal_id:
+                normalized.append({
+                    'id': cal_id,
+                    'name': inner.get('summary') or 'Unnamed Calendar',
+                    'description': inner.get('description') or 'No description'
+                })
+        return normalized
+
     def list_feishu_calendars(self) -> List[Dict]:
         """List all available Feishu calendars."""
         try:
@@ -548,30 +954,35 @@ class AuthHandler:
                 print("No valid user token available")
                 return []
 
-            # First, get primary calendar
-            response = requests.post(
-                'https://open.feishu.cn/open-apis/calendar/v4/calendars/primary',
-                headers={'Authorization': f'Bearer {user_token}'}
-            )
+            # Fetch the primary calendar and the calendar list concurrently
+            headers = self._feishu_user_auth_headers
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                primary_future = executor.submit(
+                    self._http.post,
+                    'https://open.feishu.cn/open-apis/calendar/v4/calendars/primary',
+                    headers=headers,
+                    timeout=_HTTP_TIMEOUT
+                )
+                list_future = executor.submit(
+                    self._http.get,
+                    'https://open.feishu.cn/open-apis/calendar/v4/calendars',
+                    headers=headers,
+                    timeout=_HTTP_TIMEOUT
+                )
+                response = primary_future.result()
+                list_response = list_future.result()
             
             if response.status_code != 200:
                 print(f"Failed to get primary calendar: {response.status_code}")
                 return []
                 
-            data = response.json()
-            primary_calendar = data.get('data', {}).get('calendars', [])[0]
-            calendars = [primary_calendar]
-
-            # Then get other calendars
-            list_response = requests.get(
-                'https://open.feishu.cn/open-apis/calendar/v4/calendars',
-                headers={'Authorization': f'Bearer {user_token}'}
-            )
+            data = _json_loads(response.content)
+            primary_calendars = (data.get('data') or {}).get('calendars') or []
+            calendars = primary_calendars[:1]
 
             if list_response.status_code == 200:
-                list_data = list_response.json()
-                extra_calendars = list_data.get('data', {}).get('calendars', [])
-                calendars.extend(extra_calendars)
+                list_data = _json_loads(list_response.content)
+                calendars.extend((list_data.get('data') or {}).get('calendars') or [])
 
             return calendars
 
@@ -602,114 +1013,122 @@ class AuthHandler:
 
     def get_feishu_user_token_from_code(self, code: str) -> bool:
         """Get Feishu user token from OAuth code."""
-        try:
-            # Create token request using v2 endpoint
-            url = 'https://open.feishu.cn/open-apis/authen/v2/oauth/token'
-            app_id, app_secret = self.get_feishu_app_info()
-            redirect_uri = "http://127.0.0.1:5000/callback"  # Match the authorization URL
+        with self.batch_save():
+            try:
+                # Create token request using v2 endpoint
+                url = 'https://open.feishu.cn/open-apis/authen/v2/oauth/token'
+                app_id, app_secret = self.get_feishu_app_info()
+                redirect_uri = "http://127.0.0.1:5000/callback"  # Match the authorization URL
             
-            headers = {
-                'Content-Type': 'application/json'
-            }
+                headers = {
+                    'Content-Type': 'application/json'
+                }
             
-            payload = {
-                'grant_type': 'authorization_code',
-                'client_id': app_id,
-                'client_secret': app_secret,
-                'code': code,
-                'redirect_uri': redirect_uri  # Add the redirect_uri parameter
-            }
+                payload = {
+                    'grant_type': 'authorization_code',
+                    'client_id': app_id,
+                    'client_secret': app_secret,
+                    'code': code,
+                    'redirect_uri': redirect_uri  # Add the redirect_uri parameter
+                }
 
-            # Debug logging
-            print("\nDebug - Token Exchange Request:")
-            print(f"URL: {url}")
-            print(f"Headers: {headers}")
-            debug_payload = {**payload, 'client_secret': '***'}
-            print(f"Payload: {json.dumps(debug_payload, indent=2)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Token exchange request: URL=%s Headers=%s Payload=%s", url, headers,
+                                 json.dumps({**payload, 'client_secret': '***', 'code': '***'}, indent=2))
 
-            response = requests.post(url, headers=headers, json=payload)
+                response = self._http.post(url, headers=headers, data=_json_dumps(payload), timeout=_HTTP_TIMEOUT)
             
-            if response.status_code != 200:
-                print(f"Failed to get access token: {response.status_code}")
-                try:
-                    error_data = response.json()
-                    print(f"Error details: {json.dumps(error_data, indent=2)}")
-                except:
-                    print(f"Error response: {response.text}")
-                return False
+                if response.status_code != 200:
+                    print(f"Failed to get access token: {response.status_code}")
+                    try:
+                        error_data = _json_loads(response.content)
+                        print(f"Error details: {json.dumps(error_data, indent=2)}")
+                    except:
+                        print(f"Error response: {response.text}")
+                    return False
 
-            response_data = response.json()
-            if response_data.get('code') != 0:
-                print(f"Error in response: {response_data}")
-                return False
+                response_data = _json_loads(response.content)
+                if response_data.get('code') != 0:
+                    print(f"Error in response: {response_data}")
+                    return False
 
-            # Extract token data
-            access_token = response_data.get('access_token')
-            refresh_token = response_data.get('refresh_token')
-            access_token_expires_in = response_data.get('expires_in')
-            refresh_token_expires_in = response_data.get('refresh_token_expires_in')
+                # Extract token data
+                access_token = response_data.get('access_token')
+                refresh_token = response_data.get('refresh_token')
+                access_token_expires_in = response_data.get('expires_in')
+                refresh_token_expires_in = response_data.get('refresh_token_expires_in')
 
-            if not all([access_token, refresh_token, access_token_expires_in, refresh_token_expires_in]):
-                print("Missing required token data in response")
-                print("Response data:", json.dumps(response_data, indent=2))
-                return False
+                if not all([access_token, refresh_token, access_token_expires_in, refresh_token_expires_in]):
+                    print("Missing required token data in response")
+                    print("Response data:", json.dumps(response_data, indent=2))
+                    return False
 
-            # Store the new tokens
-            self.set_feishu_user_token(
-                token=access_token,
-                refresh_token=refresh_token,
-                expires_in=access_token_expires_in,
-                refresh_expires_in=refresh_token_expires_in
-            )
+                # Store the new tokens
+                self.set_feishu_user_token(
+                    token=access_token,
+                    refresh_token=refresh_token,
+                    expires_in=access_token_expires_in,
+                    refresh_expires_in=refresh_token_expires_in
+                )
             
-            print("Successfully obtained new Feishu tokens")
-            return True
+                print("Successfully obtained new Feishu tokens")
+                return True
 
-        except Exception as e:
-            print(f"Error getting user token: {e}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
-            return False
+            except Exception as e:
+                print(f"Error getting user token: {e}")
+                import traceback
+                print(f"Traceback: {traceback.format_exc()}")
+                return False
 
     def get_outlook_token_from_code(self, code: str) -> bool:
         """Get Outlook token from OAuth code."""
-        try:
-            result = self.outlook_account.connection.request_token(code)
-            if result:
-                token_dict = self.outlook_account.connection.token_backend.token
-                self.set_outlook_token(
-                    token_dict['access_token'],
-                    token_dict['refresh_token'],
-                    3600  # Standard expiration
-                )
-                self.set_outlook_authenticated(True)
-                return True
-        except Exception as e:
-            print(f"Failed to get Outlook token: {e}")
-        return False
+        with self.batch_save():
+            try:
+                result = self.outlook_account.connection.request_token(code)
+                if result:
+                    token_dict = self.outlook_account.connection.token_backend.token
+                    self.set_outlook_token(
+                        token_dict['access_token'],
+                        token_dict['refresh_token'],
+                        3600  # Standard expiration
+                    )
+                    self.set_outlook_authenticated(True)
+                    return True
+            except Exception as e:
+                print(f"Failed to get Outlook token: {e}")
+            return False
 
     # Token getters and setters
     def set_feishu_app_info(self, app_id: str, app_secret: str) -> None:
         """Set Feishu app credentials."""
+        if (app_id, app_secret) == self.get_feishu_app_info():
+            return
         self.config['feishu']['app_info'] = {
             'app_id': app_id,
             'app_secret': app_secret
         }
-        self._save_config()
+        self._feishu_app_info_cache = (app_id, app_secret)
+        self._mark_dirty()
 
     def get_feishu_app_info(self) -> Tuple[Optional[str], Optional[str]]:
         """Get Feishu app credentials."""
-        app_info = self.config['feishu']['app_info']
-        return app_info['app_id'], app_info['app_secret']
+        if self._feishu_app_info_cache is None:
+            app_info = self.config['feishu']['app_info']
+            self._feishu_app_info_cache = (app_info['app_id'], app_info['app_secret'])
+        return self._feishu_app_info_cache
 
     def set_feishu_app_token(self, token: str, expires_in: int) -> None:
         """Set Feishu app access token with expiration."""
         expiration = int(time.time()) + expires_in
+        # Same token re-issued with a near-identical expiry: nothing worth persisting
+        if token == self._feishu_app_token and abs(expiration - self._feishu_app_expiry) < 60:
+            return
         self.config['feishu']['tokens']['app_access_token'] = {
             'token': token,
             'expiration_time': expiration
         }
-        self._save_config()
+        self._cache_feishu_tokens()
+        self._mark_dirty(write_yaml=False)
 
     def set_feishu_user_token(self, token: str, refresh_token: str, expires_in: int, refresh_expires_in: int = None) -> None:
         """Set Feishu user access token with refresh token."""
@@ -725,90 +1144,103 @@ class AuthHandler:
             token_data['refresh_token_expiration_time'] = current_time + refresh_expires_in
         
         self.config['feishu']['tokens']['user_access_token'] = token_data
-        self._save_config()
-
-    def get_feishu_app_token(self) -> Optional[str]:
-        """Get Feishu app token if valid."""
-        token_data = self.config['feishu']['tokens']['app_access_token']
-        if not token_data['token'] or not token_data['expiration_time']:
+        self._cache_feishu_tokens()
+        # A freshly issued token doesn't need a probe
+        self._feishu_user_token_probed = True
+        self._mark_dirty(write_yaml=False)
+
+    def get_feishu_app_token(self, monotonic_now: Optional[float] = None) -> Optional[str]:
+        """Get Feishu app token if valid; monotonic_now is a time.monotonic() reading to reuse."""
+        if not self._feishu_app_token or not self._feishu_app_expiry:
             return None
         
-        if int(time.time()) > token_data['expiration_time']:
+        if (time.monotonic() if monotonic_now is None else monotonic_now) > self._feishu_app_deadline:
             return None
         
-        return token_data['token']
+        return self._feishu_app_token
 
     def get_feishu_user_token(self) -> Optional[str]:
         """Get Feishu user token if valid."""
-        token_data = self.config['feishu']['tokens']['user_access_token']
-        if not token_data.get('token') or not token_data.get('expiration_time'):
+        if not self._feishu_user_token:
             return None
+
+        # Without a stored expiry, trust the token only once the API accepted it
+        if not self._feishu_user_expiry:
+            return self._feishu_user_token if self._feishu_user_token_probed else None
         
-        if int(time.time()) > token_data['expiration_time']:
+        if time.monotonic() > self._feishu_user_deadline:
             return None
         
-        return token_data['token']
+        return self._feishu_user_token
     
     def get_feishu_refresh_token(self) -> Optional[str]:
         """Get Feishu refresh token if not expired."""
-        try:
-            token_data = self.config['feishu']['tokens']['user_access_token']
-            refresh_token = token_data.get('refresh_token')
-            
-            # Basic validation of token format
-            if not refresh_token or len(refresh_token.strip()) < 10:  # Simple length check
-                print("Invalid refresh token format in storage")
-                return None
-                
-            refresh_expiration = token_data.get('refresh_token_expiration_time')
-            
-            # If expiration time exists, check it
-            if refresh_expiration and int(time.time()) >= refresh_expiration:
-                print("Refresh token has expired")
-                return None
-                
-            return refresh_token.strip()
-            
-        except Exception as e:
-            print(f"Error retrieving refresh token: {e}")
+        if not self._feishu_refresh_token:
+            print("Invalid refresh token format in storage")
             return None
 
+        # If expiration time exists, check it
+        if self._feishu_refresh_deadline and time.monotonic() >= self._feishu_refresh_deadline:
+            print("Refresh token has expired")
+            return None
+
+        return self._feishu_refresh_token
+
+
+    def is_feishu_app_token_valid(self, monotonic_now: Optional[float] = None) -> bool:
+        """Check if Feishu app token is valid; monotonic_now is a time.monotonic() reading to reuse."""
+        return self.get_feishu_app_token(monotonic_now) is not None
+
+    def is_feishu_user_token_valid(self, monotonic_now: Optional[float] = None) -> bool:
+        """Check if Feishu user token is present and not about to expire."""
+        if not self._feishu_user_token or not self._feishu_user_expiry:
+            return False
+
+        return (time.monotonic() if monotonic_now is None else monotonic_now) < self._feishu_user_deadline
 
-    def is_feishu_app_token_valid(self) -> bool:
-        """Check if Feishu app token is valid."""
-        return self.get_feishu_app_token() is not None
+    def feishu_get(self, url: str, **kwargs) -> requests.Response:
+        """GET a Feishu API URL as the user over the pooled session."""
+        kwargs.setdefault('timeout', _HTTP_TIMEOUT)
+        return self._http.get(url, headers=self._feishu_user_auth_headers, **kwargs)
 
-    def is_feishu_user_token_valid(self) -> bool:
-        """Check if Feishu user token is valid and not expired."""
+    def _probe_feishu_user_token(self) -> bool:
+        """Validate the Feishu user token by making a test API call."""
         try:
-            token = self.get_feishu_user_token()
-            if not token:
+            if not self._feishu_user_token:
                 return False
-                
-            # Add additional validation by making a test API call
-            response = requests.get(
+
+            response = self._http.get(
                 'https://open.feishu.cn/open-apis/calendar/v4/calendars',
-                headers={'Authorization': f'Bearer {token}'}
+                headers=self._feishu_user_auth_headers,
+                timeout=_HTTP_TIMEOUT
             )
-            
-            return response.status_code == 200
-                
+
+            self._feishu_user_token_probed = response.status_code == 200
+            return self._feishu_user_token_probed
+
         except Exception:
             return False
         
     def set_outlook_app_info(self, client_id: str, client_secret: str, tenant_id: str) -> None:
         """Set Outlook app credentials."""
+        if (client_id, client_secret, tenant_id) == self.get_outlook_app_info():
+            return
         self.config['outlook']['app_info'] = {
             'client_id': client_id,
             'client_secret': client_secret,
             'tenant_id': tenant_id
         }
-        self._save_config()
+        self._outlook_app_info_cache = (client_id, client_secret, tenant_id)
+        self._mark_dirty()
 
     def get_outlook_app_info(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         """Get Outlook app credentials."""
-        app_info = self.config['outlook']['app_info']
-        return app_info['client_id'], app_info['client_secret'], app_info['tenant_id']
+        if self._outlook_app_info_cache is None:
+            app_info = self.config['outlook']['app_info']
+            self._outlook_app_info_cache = (
+                app_info['client_id'], app_info['client_secret'], app_info['tenant_id']
+            )
+        return self._outlook_app_info_cache
 
     def set_outlook_token(self, access_token: str, refresh_token: str, expires_in: int) -> None:
         """Set Outlook tokens with expiration."""
@@ -818,7 +1250,7 @@ class AuthHandler:
             'refresh_token': refresh_token,
             'expiration_time': expiration
         }
-        self._save_config()
+        self._mark_dirty(write_yaml=False)
 
     def get_outlook_token(self) -> Tuple[Optional[str], Optional[str], Optional[int]]:
         """Get Outlook token info if valid."""
@@ -830,8 +1262,8 @@ class AuthHandler:
             not token_data['expiration_time']):
             return None, None, None
         
-        # Check if token is expired
-        if int(time.time()) > token_data['expiration_time']:
+        # Check if token is expired or about to expire
+        if time.time() > token_data['expiration_time'] - self.TOKEN_EXPIRY_SKEW:
             return None, None, None
         
         return (token_data['access_token'], 
@@ -841,15 +1273,29 @@ class AuthHandler:
     def set_outlook_authenticated(self, status: bool) -> None:
         """Set Outlook authentication status."""
         self.config['outlook']['authenticated'] = status
-        self._save_config()
+        self._mark_dirty()
+
+    @staticmethod
+    def _build_calendar_pair(feishu_cal: Dict, outlook_cal: Dict) -> Dict:
+        """Build a calendar pair entry from normalized Feishu and Outlook calendars."""
+        return {
+            'feishu': {
+                'id': feishu_cal['id'],
+                'name': feishu_cal['name']
+            },
+            'outlook': {
+                'id': outlook_cal['id'],
+                'name': outlook_cal['name']
+            }
+        }
 
     def setup_calendar_pairs(self) -> bool:
         """Setup calendar pairs for syncing."""
         try:
             print("\nSetting up calendar pairs...")
             
-            # Get Feishu calendars
-            feishu_calendars = self.list_feishu_calendars()
+            # Get Feishu calendars, flattened to id/name once
+            feishu_calendars = self._normalize_feishu_calendars(self.list_feishu_calendars())
             if not feishu_calendars:
                 print("No Feishu calendars found")
                 return False
@@ -862,61 +1308,61 @@ class AuthHandler:
 
             print("\nAvailable Feishu Calendars:")
             for i, cal in enumerate(feishu_calendars, 1):
-                name = cal.get('calendar', {}).get('summary') or cal.get('summary', 'Unnamed Calendar')
-                calendar_id = cal.get('calendar', {}).get('calendar_id') or cal.get('calendar_id')
-                print(f"{i}. {name} (ID: {calendar_id})")
+                print(f"{i}. {cal['name']} (ID: {cal['id']})")
 
             print("\nAvailable Outlook Calendars:")
             for i, cal in enumerate(outlook_calendars, 1):
                 print(f"{i}. {cal['name']} (ID: {cal['id']})")
 
             calendar_pairs = []
-            while True:
+            pairs_json = os.environ.get('CAL_PAIRS_JSON')
+            if pairs_json:
+                # Non-interactive setup: a JSON list of [feishu_number, outlook_number] pairs
                 try:
-                    print("\nEnter a calendar pair (or press Enter to finish):")
-                    feishu_input = input("Enter Feishu calendar number: ").strip()
-                    if not feishu_input:
-                        break
-
-                    outlook_input = input("Enter Outlook calendar number: ").strip()
-                    if not outlook_input:
-                        break
-
-                    feishu_idx = int(feishu_input) - 1
-                    outlook_idx = int(outlook_input) - 1
-
-                    if (0 <= feishu_idx < len(feishu_calendars) and 
-                        0 <= outlook_idx < len(outlook_calendars)):
+                    indices = [(int(f) - 1, int(o) - 1) for f, o in json.loads(pairs_json)]
+                except (ValueError, TypeError) as e:
+                    print(f"Invalid CAL_PAIRS_JSON: {e}")
+                    return False
+                if not all(0 <= f < len(feishu_calendars) and 0 <= o < len(outlook_calendars) for f, o in indices):
+                    print("Invalid calendar numbers in CAL_PAIRS_JSON")
+                    return False
+                calendar_pairs = [self._build_calendar_pair(feishu_calendars[f], outlook_calendars[o])
+                                  for f, o in indices]
+            else:
+                while True:
+                    try:
+                        print("\nEnter a calendar pair (or press Enter to finish):")
+                        feishu_input = input("Enter Feishu calendar number: ").strip()
+                        if not feishu_input:
+                            break
+
+                        outlook_input = input("Enter Outlook calendar number: ").strip()
+                        if not outlook_input:
+                            break
+
+                        feishu_idx = int(feishu_input) - 1
+                        outlook_idx = int(outlook_input) - 1
+
+                        if (0 <= feishu_idx < len(feishu_calendars) and 
+                            0 <= outlook_idx < len(outlook_calendars)):
                         
-                        feishu_cal = feishu_calendars[feishu_idx]
-                        outlook_cal = outlook_calendars[outlook_idx]
-
-                        pair = {
-                            'feishu': {
-                                'id': feishu_cal.get('calendar', {}).get('calendar_id') or feishu_cal.get('calendar_id'),
-                                'name': feishu_cal.get('calendar', {}).get('summary') or feishu_cal.get('summary')
-                            },
-                            'outlook': {
-                                'id': outlook_cal['id'],
-                                'name': outlook_cal['name']
-                            }
-                        }
-                        calendar_pairs.append(pair)
-                        print(f"Pair added: {pair['feishu']['name']} -> {pair['outlook']['name']}")
-                    else:
-                        print("Invalid calendar numbers")
+                            pair = self._build_calendar_pair(feishu_calendars[feishu_idx], outlook_calendars[outlook_idx])
+                            calendar_pairs.append(pair)
+                            print(f"Pair added: {pair['feishu']['name']} -> {pair['outlook']['name']}")
+                        else:
+                            print("Invalid calendar numbers")
 
-                except ValueError:
-                    print("Invalid input. Please enter numbers.")
-                except Exception as e:
-                    print(f"Error adding pair: {e}")
+                    except ValueError:
+                        print("Invalid input. Please enter numbers.")
+                    except Exception as e:
+                        print(f"Error adding pair: {e}")
 
             if not calendar_pairs:
                 print("No calendar pairs configured")
                 return False
 
             self.config['calendar_pairs'] = calendar_pairs
-            self._save_config()
+            self._mark_dirty()
             print(f"\nSuccessfully configured {len(calendar_pairs)} calendar pairs")
             return True
 
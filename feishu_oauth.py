@@ -1,11 +1,61 @@
 import urllib.parse
-import uvicorn
 import base64
+import json
 import os
+import threading
 import lark_oapi as lark
-from typing import Optional
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import RedirectResponse
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Lark SDK log level; DEBUG formats every request and response
+_FEISHU_LOG_LEVEL = getattr(
+    lark.LogLevel, os.environ.get('FEISHU_LOG_LEVEL', 'WARNING').upper(), lark.LogLevel.WARNING
+)
+
+@lru_cache(maxsize=4)
+def get_lark_client(app_id: str, app_secret: str) -> lark.Client:
+    """Get a shared lark client for the given app credentials."""
+    return lark.Client.builder() \
+        .app_id(app_id) \
+        .app_secret(app_secret) \
+        .enable_set_token(True) \
+        .log_level(_FEISHU_LOG_LEVEL) \
+        .build()
+
+class _CallbackHandler(BaseHTTPRequestHandler):
+    """Redirect / to the authorize URL and capture the code sent to /callback."""
+
+    def do_GET(self):
+        oauth = self.server.oauth
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/":
+            self.send_response(307)
+            self.send_header("Location", oauth.construct_oauth_url())
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif url.path == "/callback":
+            code = urllib.parse.parse_qs(url.query).get("code", [None])[0]
+            if not code:
+                self._send_json(400, {"detail": "No OAuth code received"})
+                return
+            oauth.oauth_code = code
+            self._send_json(200, {"message": "OAuth code received. You can close this window now."})
+            # shutdown() blocks until serve_forever() returns, so it can't run on this thread
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            self._send_json(404, {"detail": "Not Found"})
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep the console free of per-request access logs
+        pass
 
 class FeishuOAuth:
     def __init__(self, app_id: str, app_secret: str):
@@ -14,52 +64,39 @@ class FeishuOAuth:
         self.REDIRECT_URI = "http://127.0.0.1:5000/callback"
         self.SCOPE = "calendar:calendar:readonly calendar:calendar:read calendar:calendar.event:read offline_access"
         self.STATE = base64.urlsafe_b64encode(os.urandom(32)).rstrip(b'=').decode('utf-8')
+        params = {
+            "app_id": self.APP_ID,
+            "redirect_uri": self.REDIRECT_URI,
+            "scope": self.SCOPE,
+            "state": self.STATE
+        }
+        self._oauth_url = "https://open.feishu.cn/open-apis/authen/v1/authorize?" + \
+            urllib.parse.urlencode(params, quote_via=urllib.parse.quote, safe='')
         
-        # Initialize FastAPI and lark client
-        self.app = FastAPI()
-        self.client = lark.Client.builder() \
-            .app_id(self.APP_ID) \
-            .app_secret(self.APP_SECRET) \
-            .enable_set_token(True) \
-            .log_level(lark.LogLevel.DEBUG) \
-            .build()
+        # Shared lark client
+        self.client = get_lark_client(self.APP_ID, self.APP_SECRET)
         
-        # OAuth code storage
+        # OAuth code storage and the callback server, stopped once a code arrives
         self.oauth_code = None
-        
-        # Setup routes
-        self._setup_routes()
-    
-    def _setup_routes(self):
-        @self.app.get("/")
-        def home():
-            return RedirectResponse(self.construct_oauth_url())
-
-        @self.app.get("/callback")
-        def callback(code: Optional[str] = None):
-            if not code:
-                raise HTTPException(status_code=400, detail="No OAuth code received")
-            self.oauth_code = code
-
-            return {"message": "OAuth code received. You can close this window now and keyboard interrupt the server in the terminal."}
+        self.server = None
 
     def construct_oauth_url(self) -> str:
-        base_url = "https://open.feishu.cn/open-apis/authen/v1/authorize"
-        params = {
-            "app_id": self.APP_ID,
-            "redirect_uri": urllib.parse.quote(self.REDIRECT_URI, safe=''),
-            "scope": urllib.parse.quote(self.SCOPE, safe=''),
-            "state": self.STATE
-        }
-        return f"{base_url}?{'&'.join(f'{k}={v}' for k, v in params.items())}"
+        return self._oauth_url
 
     def obtain_oauth_code(self) -> str:
         """Get OAuth code by providing a URL to visit."""
-        print("\nPlease visit the following URL to authorize the app and Ctrl-C when you get the success page:\n")
+        print("\nPlease visit the following URL to authorize the app:\n")
         print(self.construct_oauth_url())
         
-        # Run the server
-        uvicorn.run(self.app, host="127.0.0.1", port=5000, log_level="error")
+        # HTTPServer binds with SO_REUSEADDR, so a quick re-run isn't blocked by TIME_WAIT
+        self.server = HTTPServer(("127.0.0.1", 5000), _CallbackHandler)
+        self.server.oauth = self
+
+        # Run the server until the callback receives a code
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
         
         # After server stops (when callback received), return the code
         return self.oauth_code
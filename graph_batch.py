@@ -0,0 +1,106 @@
+import json
+import logging
+import random
+import time
+from typing import Dict, List
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+GRAPH_BATCH_URL = 'https://graph.microsoft.com/v1.0/$batch'
+
+# Graph rejects batches with more than 20 requests
+MAX_BATCH_SIZE = 20
+
+# Gateway errors are only retried for idempotent steps: a create may have gone through anyway
+GATEWAY_STATUSES = frozenset((502, 503, 504))
+
+logger = logging.getLogger(__name__)
+
+def post_graph_batch(connection, steps: List[Dict]) -> Dict[str, Dict]:
+    """POST Graph requests as one $batch call and return the sub-responses keyed by step id."""
+    if len(steps) > MAX_BATCH_SIZE:
+        raise ValueError(f"A Graph batch holds at most {MAX_BATCH_SIZE} requests, got {len(steps)}")
+
+    # The O365 connection adds the bearer token, refreshes it and JSON-encodes the body
+    response = connection.post(GRAPH_BATCH_URL, data={'requests': steps})
+    return {item['id']: item for item in _json_loads(response.content).get('responses', [])}
+
+def _retry_after(response: Dict) -> float:
+    """Read the Retry-After header of a throttled or unavailable sub-response, in seconds."""
+    headers = {key.lower(): value for key, value in (response.get('headers') or {}).items()}
+    try:
+        return float(headers.get('retry-after', 0))
+    except (TypeError, ValueError):
+        return 0
+
+def _should_retry(step: Dict, response: Dict) -> bool:
+    """Whether a failed step can safely be sent again."""
+    status = response.get('status')
+    if status == 429:
+        return True
+    if status not in GATEWAY_STATUSES:
+        return False
+    # A 503 with Retry-After is an explicit refusal; other gateway errors may hide a completed write
+    return step.get('method') in ('GET', 'DELETE') or (status == 503 and _retry_after(response) > 0)
+
+class GraphBatcher:
+    """Queue Graph requests and send them as $batch calls, retrying throttled and transient failures."""
+
+    def __init__(self, connection, max_per_batch: int = 4, max_attempts: int = 3):
+        self.connection = connection
+        self.max_per_batch = max(1, min(max_per_batch, MAX_BATCH_SIZE))
+        self.max_attempts = max_attempts
+        self.pending: Dict[str, Dict] = {}
+        self.responses: Dict[str, Dict] = {}
+
+    def add(self, step_id: str, request: Dict) -> None:
+        """Queue a request dict (method, url, headers, body) under a unique step id."""
+        self.pending[step_id] = {'id': step_id, **request}
+
+    def flush(self) -> Dict[str, Dict]:
+        """Send all queued requests in safe-sized batches, retrying throttled steps and idempotent gateway failures."""
+        attempt = 0
+        while self.pending:
+            steps = list(self.pending.values())
+            self.pending = {}
+            throttled = {}
+            delay = 0.0
+
+            for offset in range(0, len(steps), self.max_per_batch):
+                chunk = steps[offset:offset + self.max_per_batch]
+                try:
+                    responses = post_graph_batch(self.connection, chunk)
+                except Exception as e:
+                    logger.error(f"Graph batch request failed: {e}")
+                    responses = {}
+
+                for step in chunk:
+                    response = responses.get(step['id'], {'id': step['id'], 'status': 0})
+                    if _should_retry(step, response) and attempt + 1 < self.max_attempts:
+                        throttled[step['id']] = step
+                        delay = max(delay, _retry_after(response), 2 ** attempt)
+                    else:
+                        self.responses[step['id']] = response
+
+            if throttled:
+                # Jitter keeps concurrent sync threads from retrying in lockstep
+                delay += random.uniform(0, 1)
+                logger.warning(f"Graph throttled or failed {len(throttled)} requests, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                self.pending = throttled
+                attempt += 1
+
+        return self.responses
+
+    def get_responses_status_codes(self) -> Dict[str, int]:
+        """Final status code of every flushed step; 0 if the batch call itself failed."""
+        return {step_id: response.get('status', 0) for step_id, response in self.responses.items()}
+
+    def get_failed_steps(self) -> List[str]:
+        """Ids of flushed steps that did not succeed."""
+        return [step_id for step_id, status in self.get_responses_status_codes().items()
+                if not 200 <= status < 300]
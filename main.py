@@ -1,159 +1,529 @@
+import os
 import sys
 import time
-import requests
+import json
+import threading
+import atexit
+import logging
+import queue
+import signal
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime, timezone, timedelta
+from urllib.parse import urlencode
 from auth_handler import AuthHandler
-from typing import Optional, Tuple
+from graph_batch import GraphBatcher, MAX_BATCH_SIZE
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+def configure_logging() -> None:
+    """Route sync log records through a queue so sync threads never block on stdout.
+
+    Only the sync loggers are configured; the root logger and library loggers are left alone.
+    """
+    if logger.handlers:
+        return
+
+    log_queue = queue.Queue(-1)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    queue_handler = QueueHandler(log_queue)
+    level = os.environ.get('SYNC_LOG_LEVEL', 'INFO').upper()
+    for sync_logger in (logger, logging.getLogger(GraphBatcher.__module__)):
+        sync_logger.addHandler(queue_handler)
+        sync_logger.setLevel(level)
+        sync_logger.propagate = False
+
+def _env_int(name: str, default: int, minimum: int, maximum: Optional[int] = None) -> int:
+    """Read an integer setting from the environment, warning and falling back or clamping on bad values."""
+    raw = os.environ.get(name)
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={raw!r}, using {default}")
+        return default
+    clamped = max(minimum, value if maximum is None else min(value, maximum))
+    if clamped != value:
+        logger.warning(f"{name}={value} is out of range, using {clamped}")
+    return clamped
+
+# Requests per Graph $batch for calendar writes; Outlook allows 4 concurrent requests per mailbox
+GRAPH_BATCH_SIZE = _env_int('GRAPH_BATCH_SIZE', 4, 1, MAX_BATCH_SIZE)
+
+# Outlook calendars only change through our own writes between syncs, so their
+# (summary, start) -> event id maps are cached per calendar. Caches tracked with a
+# Graph delta link are updated incrementally and rebuilt daily to roll the window;
+# caches built from a plain query are refetched hourly.
+OUTLOOK_CACHE_TTL = 3600
+OUTLOOK_DELTA_TTL = 86400
+
+# Days ahead covered by the Outlook event map; later Feishu events wait until they come into range.
+# At least 2, since sync_horizon() subtracts the one-day delta TTL from the window.
+OUTLOOK_LOOKAHEAD_DAYS = _env_int('OUTLOOK_LOOKAHEAD_DAYS', 90, 2)
+# Keyed by (config path, calendar ID) so configs with different credentials never share state;
+# entries are only changed while holding the lock
+_outlook_cache: Dict[Tuple[str, str], Dict] = {}
+_outlook_cache_lock = threading.Lock()
+
+# Feishu calendars are fetched in full once and then followed with sync tokens;
+# the full fetch is repeated daily so events beyond the changes stay in step
+FEISHU_SYNC_TTL = 86400
+# Keyed and locked like _outlook_cache
+_feishu_cache: Dict[Tuple[str, str], Dict] = {}
+_feishu_cache_lock = threading.Lock()
+
+FEISHU_EVENTS_URL = 'https://open.feishu.cn/open-apis/calendar/v4/calendars/{}/events'
+GRAPH_CALENDAR_URL = 'https://graph.microsoft.com/v1.0/me/calendars'
+# Ask Graph for UTC times so delta items parse without timezone lookups
+_GRAPH_DELTA_HEADERS = {'Prefer': 'outlook.timezone="UTC", odata.maxpagesize=100'}
+
+# Bounds of the adaptive wait between continuous syncs, in seconds
+MIN_SYNC_DELAY = 60
+MAX_SYNC_DELAY = 1800
+
+# Wake-up events of the running continuous sync loops
+_sync_wakeups: List[threading.Event] = []
+_sync_wakeups_lock = threading.RLock()
+
+def request_sync() -> None:
+    """Wake every continuous sync loop so it syncs now instead of at the end of its interval."""
+    with _sync_wakeups_lock:
+        for wakeup in _sync_wakeups:
+            wakeup.set()
+
+def install_sync_signal() -> None:
+    """Trigger an immediate sync on SIGUSR1 (e.g. from a cron job or a notification hook)."""
+    if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+        # The handler interrupts the main thread, possibly while it holds a lock, so only
+        # hand off to a helper thread; request_sync takes locks of its own
+        signal.signal(signal.SIGUSR1, lambda signum, frame: threading.Thread(
+            target=request_sync, name='sync-request', daemon=True).start())
 
 def get_outlook_events(auth_handler: AuthHandler, calendar_id: str):
-    """Get Outlook events with proper query handling."""
-    if not auth_handler.verify_outlook_token():
-        print("Failed to verify Outlook token")
-        return None
+    """Get Outlook events with proper query handling; the caller verifies the Outlook token."""
 
     try:
-        schedule = auth_handler.outlook_account.schedule()
-        calendar = schedule.get_calendar(calendar_id)
+        calendar = auth_handler.get_outlook_calendar(calendar_id)
         if not calendar:
-            print(f"Failed to get calendar with ID: {calendar_id}")
+            logger.warning(f"Failed to get calendar with ID: {calendar_id}")
             return None
 
         # Get current time in UTC
         now = datetime.now(timezone.utc)
-        end_time = now + timedelta(days=365)
+        end_time = now + timedelta(days=OUTLOOK_LOOKAHEAD_DAYS)
         
-        print(f"Fetching events between: {now.isoformat()} and {end_time.isoformat()}")
+        logger.debug(f"Fetching events between: {now.isoformat()} and {end_time.isoformat()}")
 
         try:
             # Create query with proper date filtering
             query = calendar.new_query('start').greater_equal(now)
             query.chain('and').on_attribute('end').less_equal(end_time)
             
-            # Force select all needed fields
-            query.select('subject', 'start', 'end', 'location', 'body', 'is_cancelled')
+            # Select only what the event map needs; bodies can be large HTML
+            query.select('subject', 'start', 'end')
             
-            print(f"Generated query: {query}")
+            logger.debug(f"Generated query: {query}")
             
-            events = list(calendar.get_events(
+            # Stream the pages instead of materialising every event object first
+            events = calendar.get_events(
                 query=query,
                 include_recurring=True,
                 batch=50
-            ))
-            print(f"Raw events retrieved: {len(events)}")
+            )
             
             formatted_events = []
-            seen_events = {}
+            seen_ids = set()
             
             for event in events:
                 try:
+                    # Event IDs are unique, so they are enough to drop repeats across pages
+                    if event.object_id in seen_ids:
+                        logger.debug("Found duplicate: %s", event.subject)
+                        continue
+                    seen_ids.add(event.object_id)
+
                     start_time = event.start.astimezone(timezone.utc)
                     end_time = event.end.astimezone(timezone.utc)
-                    
-                    event_key = f"{event.subject}|{int(start_time.timestamp())}|{int(end_time.timestamp())}"
-                    
-                    if event_key not in seen_events:
-                        formatted_event = {
-                            'event_id': event.object_id,
-                            'summary': event.subject,
-                            'description': event.body or '',
-                            'start_time': {'timestamp': str(int(start_time.timestamp()))},
-                            'end_time': {'timestamp': str(int(end_time.timestamp()))},
-                            'location': event.location or '',
-                            'status': 'confirmed' if not event.is_cancelled else 'cancelled'
-                        }
-                        formatted_events.append(formatted_event)
-                        seen_events[event_key] = formatted_event
-                        print(f"Processing event: {event.subject} at {start_time}")
-                    else:
-                        print(f"Found duplicate - New: {event.subject} at {start_time}")
-                        print(f"Existing: {seen_events[event_key]['summary']} at "
-                              f"{datetime.fromtimestamp(int(seen_events[event_key]['start_time']['timestamp']), tz=timezone.utc)}")
+                    formatted_events.append({
+                        'event_id': event.object_id,
+                        'summary': event.subject,
+                        'start_time': {'timestamp': str(int(start_time.timestamp()))},
+                        'end_time': {'timestamp': str(int(end_time.timestamp()))}
+                    })
+                    logger.debug("Processing event: %s at %s", event.subject, start_time)
                         
                 except Exception as e:
-                    print(f"Error processing individual event: {e}")
+                    logger.error(f"Error processing individual event: {e}")
                     continue
             
-            print(f"Successfully processed {len(formatted_events)} events")
+            logger.debug(f"Successfully processed {len(formatted_events)} of {len(seen_ids)} events")
             return formatted_events
             
         except Exception as e:
-            print(f"Error during event retrieval: {e}")
+            logger.error(f"Error during event retrieval: {e}")
             return None
             
     except Exception as e:
-        print(f"Error fetching Outlook events: {e}")
+        logger.error(f"Error fetching Outlook events: {e}")
         return None
 
-def get_feishu_events(auth_handler: AuthHandler, calendar_id: str):
-    """Get Feishu events with proper token verification, including deleted events."""
-    if not auth_handler.verify_feishu_tokens():
-        print("Failed to verify Feishu tokens")
+def _calendar_cache_key(auth_handler: AuthHandler, calendar_id: str) -> Tuple[str, str]:
+    """Key per-calendar sync state by the config it belongs to as well as the calendar."""
+    return os.path.abspath(auth_handler.yaml_file), calendar_id
+
+def index_outlook_events(outlook_events) -> Dict[Tuple[str, int], str]:
+    """Map future Outlook events by (summary, start timestamp) to their event IDs."""
+    current_timestamp = int(time.time())
+    existing_events = {}
+    # Only format per-event datetimes when they will actually be logged
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    for event in (outlook_events or []):
+        try:
+            start_timestamp = int(event['start_time']['timestamp'])
+            
+            # Only consider future events for syncing
+            if start_timestamp >= current_timestamp:
+                key = (
+                    event.get('summary', ''),
+                    start_timestamp
+                )
+                existing_events[key] = event['event_id']
+                if debug:
+                    logger.debug(f"Future existing event found: {event.get('summary', '')} at {datetime.fromtimestamp(start_timestamp, tz=timezone.utc)}")
+            elif debug:
+                logger.debug(f"Skipping past event from consideration: {event.get('summary', '')} at {datetime.fromtimestamp(start_timestamp, tz=timezone.utc)}")
+        except Exception as e:
+            logger.error(f"Error processing existing event: {e}")
+
+    return existing_events
+
+def fetch_outlook_delta(auth_handler: AuthHandler, calendar_id: str, delta_link: Optional[str] = None) -> Optional[Tuple[List[Dict], str]]:
+    """Run one Graph calendarView delta round; returns the changed items and the next delta link."""
+    if delta_link:
+        url = delta_link
+    else:
+        now = datetime.now(timezone.utc)
+        params = urlencode({
+            'startDateTime': now.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'endDateTime': (now + timedelta(days=OUTLOOK_LOOKAHEAD_DAYS)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        })
+        url = f"{GRAPH_CALENDAR_URL}/{calendar_id}/calendarView/delta?{params}"
+
+    connection = auth_handler.outlook_account.connection
+    items = []
+    try:
+        while True:
+            response = connection.get(url, headers=_GRAPH_DELTA_HEADERS)
+            data = _json_loads(response.content)
+            items.extend(data.get('value', []))
+            url = data.get('@odata.nextLink')
+            if not url:
+                return items, data['@odata.deltaLink']
+    except Exception as e:
+        logger.warning(f"Outlook delta query failed: {e}")
         return None
 
+def apply_outlook_delta(existing_events: Dict[Tuple[str, int], str], event_keys: Dict[str, Tuple[str, int]], items: List[Dict]) -> None:
+    """Apply delta items to an event map and its event id -> key index."""
+    for item in items:
+        # Drop the previous version of a changed or removed event
+        key = event_keys.pop(item['id'], None)
+        if key is not None and existing_events.get(key) == item['id']:
+            del existing_events[key]
+        if '@removed' in item:
+            continue
+
+        try:
+            start = datetime.fromisoformat(item['start']['dateTime'][:19]).replace(tzinfo=timezone.utc)
+            key = (item.get('subject') or '', int(start.timestamp()))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Error processing Outlook delta item: {e}")
+            continue
+        existing_events[key] = item['id']
+        event_keys[item['id']] = key
+
+def get_existing_outlook_events(auth_handler: AuthHandler, calendar_id: str) -> Optional[Dict[Tuple[str, int], str]]:
+    """Return the cached event map of an Outlook calendar, kept current with Graph delta queries."""
+    cache_key = _calendar_cache_key(auth_handler, calendar_id)
+    with _outlook_cache_lock:
+        cached = _outlook_cache.get(cache_key)
+        delta_link = cached['delta_link'] if cached else None
+    now = time.monotonic()
+
+    if cached:
+        age = now - cached['fetched_at']
+        if delta_link and age < OUTLOOK_DELTA_TTL:
+            result = fetch_outlook_delta(auth_handler, calendar_id, delta_link)
+            if result is not None:
+                items, next_link = result
+                with _outlook_cache_lock:
+                    # Only apply the round to the entry it was started from
+                    if _outlook_cache.get(cache_key) is cached:
+                        cached['delta_link'] = next_link
+                        apply_outlook_delta(cached['events'], cached['event_keys'], items)
+                        logger.debug(f"Applied {len(items)} Outlook changes to {len(cached['events'])} cached events")
+                        return cached['events']
+        elif not delta_link and age < OUTLOOK_CACHE_TTL:
+            logger.debug(f"Using {len(cached['events'])} cached Outlook events")
+            return cached['events']
+
+    # Full fetch: start a new delta round, or fall back to a plain query
+    entry = {'fetched_at': now, 'events': {}, 'event_keys': {}, 'delta_link': None}
+    result = fetch_outlook_delta(auth_handler, calendar_id)
+    if result is not None:
+        items, entry['delta_link'] = result
+        apply_outlook_delta(entry['events'], entry['event_keys'], items)
+    else:
+        outlook_events = get_outlook_events(auth_handler, calendar_id)
+        if outlook_events is None:
+            return None
+        entry['events'] = index_outlook_events(outlook_events)
+
+    with _outlook_cache_lock:
+        _outlook_cache[cache_key] = entry
+    return entry['events']
+
+def get_existing_outlook_events_batch(auth_handler: AuthHandler, calendar_ids: List[str]) -> Dict[str, Optional[Dict[Tuple[str, int], str]]]:
+    """Fetch the event maps of several Outlook calendars concurrently, keyed by calendar ID."""
+    if not calendar_ids:
+        return {}
+
+    # Outlook allows 4 concurrent requests per mailbox
+    with ThreadPoolExecutor(max_workers=min(4, len(calendar_ids))) as executor:
+        results = executor.map(lambda calendar_id: get_existing_outlook_events(auth_handler, calendar_id), calendar_ids)
+        return dict(zip(calendar_ids, results))
+
+def invalidate_outlook_events(auth_handler: AuthHandler, calendar_id: str) -> None:
+    """Drop the cached event map so the next sync refetches the calendar."""
+    with _outlook_cache_lock:
+        _outlook_cache.pop(_calendar_cache_key(auth_handler, calendar_id), None)
+
+def _fetch_feishu_pages(auth_handler: AuthHandler, calendar_id: str, params: Dict) -> Optional[Tuple[List[Dict], Optional[str]]]:
+    """Page through the Feishu events endpoint; returns the items and the sync token of the last page."""
+    url = FEISHU_EVENTS_URL.format(calendar_id)
+    all_events = []
+    page_token = None
+
+    while True:
+        # Prepare request parameters
+        page_params = dict(params, page_size=100)  # Maximum allowed by API
+        if page_token:
+            page_params['page_token'] = page_token
+
+        response = auth_handler.feishu_get(url, params=page_params)
+
+        if response.status_code == 401:
+            logger.warning("Feishu rejected the user token while fetching events")
+            auth_handler.invalidate_feishu_user_token()
+            return None
+        if not response.ok:
+            logger.warning(f"Failed to get Feishu events: {response.status_code}")
+            return None
+
+        response_data = _json_loads(response.content)
+        if response_data.get('code', 0) != 0:
+            logger.warning(f"Failed to get Feishu events: {response_data.get('msg')} (code {response_data.get('code')})")
+            return None
+
+        data = response_data.get('data', {})
+        all_events.extend(data.get('items', []))
+
+        # Check for more pages
+        page_token = data.get('page_token')
+        if not page_token or not data.get('has_more', True):
+            return all_events, data.get('sync_token')
+
+def _prune_past_feishu_events(events: Dict[str, Dict], now: int) -> None:
+    """Drop cached Feishu events that have already ended."""
+    for event_id, event in list(events.items()):
+        try:
+            if int(float(event['end_time']['timestamp'])) < now:
+                del events[event_id]
+        except (KeyError, TypeError, ValueError):
+            continue
+
+def get_feishu_events(auth_handler: AuthHandler, calendar_id: str):
+    """Get Feishu events, including deleted events; the caller verifies the Feishu tokens.
+
+    After a full fetch, later calls pass the stored sync_token and merge only the changed events.
+    """
+
     try:
         user_token = auth_handler.get_feishu_user_token()
         if not user_token:
-            print("Failed to get Feishu user token")
+            logger.warning("Failed to get Feishu user token")
             return None
 
+        cache_key = _calendar_cache_key(auth_handler, calendar_id)
+        with _feishu_cache_lock:
+            cached = _feishu_cache.get(cache_key)
+            sync_token = cached['sync_token'] if cached else None
+        now = time.monotonic()
+
+        if cached and now - cached['fetched_at'] < FEISHU_SYNC_TTL:
+            result = _fetch_feishu_pages(auth_handler, calendar_id, {'sync_token': sync_token})
+            if result is not None:
+                items, next_token = result
+                with _feishu_cache_lock:
+                    # Only merge into the entry the sync token came from
+                    if _feishu_cache.get(cache_key) is cached:
+                        # Changed events replace their previous version; deleted ones arrive as cancelled
+                        for item in items:
+                            cached['events'][item['event_id']] = item
+                        cached['sync_token'] = next_token or sync_token
+                        _prune_past_feishu_events(cached['events'], int(time.time()))
+                        logger.info(f"Retrieved {len(items)} changed events from Feishu")
+                        return list(cached['events'].values())
+            logger.info("Feishu incremental sync failed, fetching the full calendar")
+
         # Get current time for pagination start
-        start_time = str(int(time.time()))
-        all_events = []
-        page_token = None
+        result = _fetch_feishu_pages(auth_handler, calendar_id, {'start_time': str(int(time.time()))})
+        if result is None:
+            return None
+        all_events, sync_token = result
+
+        with _feishu_cache_lock:
+            if sync_token:
+                _feishu_cache[cache_key] = {
+                    'fetched_at': now,
+                    'sync_token': sync_token,
+                    'events': {event['event_id']: event for event in all_events if event.get('event_id')}
+                }
+            else:
+                _feishu_cache.pop(cache_key, None)
 
-        while True:
-            # Prepare request parameters
-            params = {
-                'start_time': start_time,
-                'page_size': 100  # Maximum allowed by API
-            }
-            if page_token:
-                params['page_token'] = page_token
-
-            response = requests.get(
-                f'https://open.feishu.cn/open-apis/calendar/v4/calendars/{calendar_id}/events',
-                headers={'Authorization': f'Bearer {user_token}'},
-                params=params
-            )
+        logger.info(f"Retrieved {len(all_events)} events from Feishu")
+        return all_events
 
-            if response.status_code != 200:
-                print(f"Failed to get Feishu events: {response.status_code}")
-                return None
+    except Exception as e:
+        logger.error(f"Error fetching Feishu events: {e}")
+        return None
 
-            response_data = response.json()
-            items = response_data.get('data', {}).get('items', [])
-            all_events.extend(items)
+def get_feishu_events_batch(auth_handler: AuthHandler, calendar_ids: List[str]) -> Dict[str, Optional[List]]:
+    """Fetch Feishu events for several calendars concurrently, keyed by calendar ID."""
+    if not calendar_ids:
+        return {}
 
-            # Check for more pages
-            page_token = response_data.get('data', {}).get('page_token')
-            if not page_token:
-                break
+    with ThreadPoolExecutor(max_workers=min(8, len(calendar_ids))) as executor:
+        results = executor.map(lambda calendar_id: get_feishu_events(auth_handler, calendar_id), calendar_ids)
+        return dict(zip(calendar_ids, results))
 
-        print(f"Retrieved {len(all_events)} events from Feishu")
-        return all_events
+def sync_horizon(now: int) -> int:
+    """Latest start time to sync; the cached Outlook window covers it even a day after it was built."""
+    return now + OUTLOOK_LOOKAHEAD_DAYS * 86400 - OUTLOOK_DELTA_TTL
 
-    except Exception as e:
-        print(f"Error fetching Feishu events: {e}")
-        return None
+def filter_future_events(events) -> List[Tuple[str, int, int, Dict]]:
+    """Filter out past events from Feishu events list.
 
-def filter_future_events(events):
-    """Filter out past events from Feishu events list."""
+    Each event's timestamps are parsed once here; the result holds (summary, start_ts, end_ts, event) records.
+    """
     now = int(time.time())
+    horizon = sync_horizon(now)
     future_events = []
     
     for event in events:
         try:
             start_timestamp = int(float(event['start_time']['timestamp']))
-            if start_timestamp >= now:
-                future_events.append(event)
-        except (KeyError, ValueError) as e:
-            print(f"Error processing event timestamp: {e}")
+            if now <= start_timestamp <= horizon:
+                end_timestamp = int(float(event['end_time']['timestamp']))
+                # Graph stores subjects stripped, so match on the stripped summary as well
+                future_events.append(((event.get('summary') or '').strip(), start_timestamp, end_timestamp, event))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Error processing event timestamp: {e}")
             continue
             
     return future_events
 
-def sync_calendar_events(auth_handler: AuthHandler, feishu_events, outlook_events, outlook_calendar_id: str) -> Tuple[int, int, int]:
-    """Sync events (including deletions) from Feishu to specific Outlook calendar."""
+def prepare_outlook_event(record: Tuple[str, int, int, Dict], existing_events, current_timestamp: int) -> Tuple[str, Optional[Dict]]:
+    """Build the Graph event JSON for a new Feishu event record from filter_future_events.
+
+    Returns ('pending', graph_event) for events to create, otherwise ('skipped' | 'failed' | 'ignored', None).
+    """
+    summary, start_timestamp, end_timestamp, event = record
+    try:
+        # Skip already cancelled events
+        if event.get('status') == 'cancelled':
+            logger.debug("Skipping cancelled event")
+            return 'ignored', None
+
+        # Validate required fields
+        if not summary:
+            logger.debug("Skipping event with no summary")
+            return 'failed', None
+
+        # Skip past events
+        if start_timestamp < current_timestamp:
+            logger.debug("Skipping past event: %s", summary)
+            return 'ignored', None
+
+        if (summary, start_timestamp) in existing_events:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Skipping existing event: {summary} at {datetime.fromtimestamp(start_timestamp, tz=timezone.utc)}")
+            return 'skipped', None
+
+        # Set required fields, with times in UTC
+        start_time = datetime.fromtimestamp(start_timestamp, tz=timezone.utc)
+        end_time = datetime.fromtimestamp(end_timestamp, tz=timezone.utc)
+        logger.debug("New event found: %s at %s", summary, start_time)
+        
+        graph_event = {
+            'subject': summary.strip(),
+            'start': {'dateTime': start_time.strftime('%Y-%m-%dT%H:%M:%S'), 'timeZone': 'UTC'},
+            'end': {'dateTime': end_time.strftime('%Y-%m-%dT%H:%M:%S'), 'timeZone': 'UTC'}
+        }
+
+        # Build event body
+        body_parts = []
+        
+        # Add description if present
+        description = event.get('description')
+        if description:
+            body_parts.append(description.strip())
+
+        # Add meeting URL if present
+        vchat = event.get('vchat', {})
+        if vchat and vchat.get('meeting_url'):
+            body_parts.append(f"Meeting URL: {vchat['meeting_url']}")
+
+        # Set body if we have any content
+        if body_parts:
+            graph_event['body'] = {'contentType': 'HTML', 'content': "\n\n".join(body_parts)}
+        
+        # Handle location - extract just the location name
+        location = event.get('location', {})
+        if isinstance(location, dict) and location.get('name'):
+            graph_event['location'] = {'displayName': location['name']}
+        elif isinstance(location, str) and location:
+            graph_event['location'] = {'displayName': location}
+
+        logger.debug("Queueing event: %s (%s - %s)", graph_event['subject'], start_time, end_time)
+        return 'pending', graph_event
+                
+    except Exception as e:
+        logger.error(f"Error processing event for sync: {e}")
+        return 'failed', None
+
+def sync_calendar_events(auth_handler: AuthHandler, feishu_events, existing_events: Dict[Tuple[str, int], str], outlook_calendar_id: str) -> Tuple[int, int, int]:
+    """Sync events (including deletions) from Feishu to specific Outlook calendar.
+
+    feishu_events are (summary, start_ts, end_ts, event) records from filter_future_events.
+
+    existing_events is the calendar's cached event map and is updated with every delete and create.
+    """
     synced_count = 0
     skipped_count = 0
     failed_count = 0
@@ -161,192 +531,98 @@ def sync_calendar_events(auth_handler: AuthHandler, feishu_events, outlook_event
     
     # Get current timestamp for filtering
     current_timestamp = int(time.time())
+    # Outlook events beyond the sync horizon have no Feishu counterpart yet, so leave them alone
+    horizon = sync_horizon(current_timestamp)
 
-    # Create lookup maps for existing events
-    existing_events = {}
+    # Create lookup map for Feishu events
     feishu_event_map = {}
-    
-    # Map Outlook events by summary and start time
-    for event in (outlook_events or []):
-        try:
-            start_timestamp = int(float(event['start_time']['timestamp']))
-            
-            # Only consider future events for syncing
-            if start_timestamp >= current_timestamp:
-                key = (
-                    event.get('summary', ''),
-                    start_timestamp
-                )
-                existing_events[key] = {
-                    'id': event['event_id'],
-                    'status': event.get('status', 'confirmed'),
-                    'start_timestamp': start_timestamp
-                }
-                print(f"Future existing event found: {event.get('summary', '')} at {datetime.fromtimestamp(start_timestamp, tz=timezone.utc)}")
-            else:
-                print(f"Skipping past event from consideration: {event.get('summary', '')} at {datetime.fromtimestamp(start_timestamp, tz=timezone.utc)}")
-        except Exception as e:
-            print(f"Error processing existing event: {e}")
 
     # Map Feishu events by summary and start time
-    for event in (feishu_events or []):
-        try:
-            summary = event.get('summary')
-            start_timestamp = event.get('start_time', {}).get('timestamp')
-            if summary and start_timestamp:
-                start_timestamp = int(float(start_timestamp))
-                if start_timestamp >= current_timestamp:
-                    key = (summary, start_timestamp)
-                    feishu_event_map[key] = event.get('status', 'confirmed')
-        except Exception as e:
-            print(f"Error mapping Feishu event: {e}")
-
-    # Get specific calendar for syncing
-    schedule = auth_handler.outlook_account.schedule()
-    calendar = schedule.get_calendar(outlook_calendar_id)
-    if not calendar:
-        print(f"Failed to get calendar with ID: {outlook_calendar_id}")
-        return 0, 0, 0, 0
-
-    # Process deletions only for future events
-    for key, outlook_data in existing_events.items():
-        summary, start_timestamp = key
-        
-        # Double check timestamp before deletion
-        if start_timestamp >= current_timestamp:
-            # If event exists in Outlook but not in Feishu, or is cancelled in Feishu
-            if key not in feishu_event_map or feishu_event_map[key] == 'cancelled':
-                try:
-                    print(f"\nProcessing deletion for future event: {summary} at {datetime.fromtimestamp(start_timestamp, tz=timezone.utc)}")
-                    event = calendar.get_event(outlook_data['id'])
-                    if event:
-                        if event.delete():
-                            print(f"Successfully deleted event: {summary}")
-                            deleted_count += 1
-                        else:
-                            print(f"Failed to delete event: {summary}")
-                            failed_count += 1
-                except Exception as e:
-                    print(f"Error deleting event: {e}")
-                    failed_count += 1
+    for summary, start_timestamp, _, event in (feishu_events or []):
+        if summary and start_timestamp >= current_timestamp:
+            feishu_event_map[(summary, start_timestamp)] = event.get('status', 'confirmed')
+
+    # Future events that exist in Outlook but not in Feishu, or are cancelled in Feishu
+    stale_events = [
+        (key, event_id) for key, event_id in existing_events.items()
+        if event_id and current_timestamp <= key[1] <= horizon and feishu_event_map.get(key, 'cancelled') == 'cancelled'
+    ]
 
     # Process regular events (new and updates)
-    for event in (feishu_events or []):
-        try:
-            # Skip already cancelled events
-            if event.get('status') == 'cancelled':
-                print("Skipping cancelled event")
-                continue
+    pending = []
+    for record in (feishu_events or []):
+        outcome, graph_event = prepare_outlook_event(record, existing_events, current_timestamp)
+        if outcome == 'pending':
+            pending.append((record[:2], graph_event))
+        elif outcome == 'skipped':
+            skipped_count += 1
+        elif outcome == 'failed':
+            failed_count += 1
 
-            # Validate required fields
-            summary = event.get('summary')
-            if not summary:
-                print("Skipping event with no summary")
+    # Send deletions and creates as Graph JSON batches instead of one request per event
+    batcher = GraphBatcher(auth_handler.outlook_account.connection, max_per_batch=GRAPH_BATCH_SIZE)
+    url = f"/me/calendars/{outlook_calendar_id}/events"
+    for i, (key, event_id) in enumerate(stale_events):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Processing deletion for future event: {key[0]} at {datetime.fromtimestamp(key[1], tz=timezone.utc)}")
+        batcher.add(f"d{i}", {'method': 'DELETE', 'url': f"{url}/{event_id}"})
+    for i, (_, graph_event) in enumerate(pending):
+        batcher.add(f"c{i}", {'method': 'POST', 'url': url,
+                              'headers': {'Content-Type': 'application/json'}, 'body': graph_event})
+    batcher.flush()
+
+    status_codes = batcher.get_responses_status_codes()
+    # existing_events is the shared cache entry, so record the writes under its lock,
+    # keeping the entry's event id -> key index in step for later delta rounds
+    with _outlook_cache_lock:
+        entry = _outlook_cache.get(_calendar_cache_key(auth_handler, outlook_calendar_id))
+        event_keys = entry['event_keys'] if entry and entry['events'] is existing_events else {}
+        for i, (key, _) in enumerate(stale_events):
+            status = status_codes.get(f"d{i}", 0)
+            # 404 means the event is already gone, which is what we wanted
+            if 200 <= status < 300 or status == 404:
+                logger.debug("Successfully deleted event: %s", key[0])
+                deleted_count += 1
+                event_keys.pop(existing_events.pop(key, None), None)
+            else:
+                logger.warning(f"Failed to delete event: {key[0]} (status {status})")
                 failed_count += 1
-                continue
 
-            start_timestamp = event.get('start_time', {}).get('timestamp')
-            end_timestamp = event.get('end_time', {}).get('timestamp')
-            if not start_timestamp or not end_timestamp:
-                print("Skipping event with invalid timestamps")
+        for i, (key, graph_event) in enumerate(pending):
+            status = status_codes.get(f"c{i}", 0)
+            if 200 <= status < 300:
+                logger.debug("Successfully synced: %s", graph_event['subject'])
+                synced_count += 1
+                # Remember the new event under the key a delta round would derive from it,
+                # so later cycles skip it without refetching Outlook
+                key = (graph_event['subject'], key[1])
+                event_id = (batcher.responses[f"c{i}"].get('body') or {}).get('id')
+                existing_events[key] = event_id
+                if event_id:
+                    event_keys[event_id] = key
+            else:
+                logger.warning(f"Failed to sync: {graph_event['subject']} (status {status})")
                 failed_count += 1
-                continue
-
-            # Convert to integer timestamp
-            start_timestamp = int(float(start_timestamp))
-            
-            # Skip past events
-            if start_timestamp < current_timestamp:
-                print(f"Skipping past event: {summary}")
-                continue
-
-            event_key = (summary, start_timestamp)
-            event_start = datetime.fromtimestamp(start_timestamp, tz=timezone.utc)
-            
-            if event_key in existing_events:
-                print(f"\nSkipping existing event: {summary}")
-                print(f"Start: {event_start}")
-                skipped_count += 1
-                continue
-
-            print(f"\nNew event found: {summary}")
-            print(f"Start: {event_start}")
-            
-            new_event = calendar.new_event()
-            
-            # Set required fields
-            new_event.subject = summary.strip()
-            
-            # Convert timestamps
-            start_time = datetime.fromtimestamp(int(float(start_timestamp)))
-            end_time = datetime.fromtimestamp(int(float(end_timestamp)))
-            
-            new_event.start = start_time
-            new_event.end = end_time
 
-            # Build event body
-            body_parts = []
-            
-            # Add description if present
-            description = event.get('description')
-            if description:
-                body_parts.append(description.strip())
-
-            # Add meeting URL if present
-            vchat = event.get('vchat', {})
-            if vchat and vchat.get('meeting_url'):
-                body_parts.append(f"Meeting URL: {vchat['meeting_url']}")
-
-            # Set body if we have any content
-            if body_parts:
-                new_event.body = "\n\n".join(body_parts)
-            
-            # Handle location - extract just the location name
-            location = event.get('location', {})
-            if isinstance(location, dict) and location.get('name'):
-                new_event.location = location['name']
-            elif isinstance(location, str) and location:
-                new_event.location = location
-
-            # Save the event with detailed error logging
-            try:
-                print(f"Saving event:")
-                print(f"  Subject: {new_event.subject}")
-                print(f"  Start: {new_event.start}")
-                print(f"  End: {new_event.end}")
-                print(f"  Body: {new_event.body}")
-                if hasattr(new_event, 'location'):
-                    print(f"  Location: {new_event.location}")
-
-                if new_event.save():
-                    print(f"Successfully created event: {summary}")
-                    print(f"Successfully synced: {summary}")
-                    synced_count += 1
-                else:
-                    print(f"Failed to sync: {summary}")
-                    failed_count += 1
-            except Exception as e:
-                print(f"Error saving event: {str(e)}")
-                failed_count += 1
-                    
-        except Exception as e:
-            print(f"Error processing event for sync: {e}")
-            failed_count += 1
+    # A failed write (e.g. a conflict) may mean the cached view is stale
+    if batcher.get_failed_steps():
+        invalidate_outlook_events(auth_handler, outlook_calendar_id)
 
-    print(f"\nDeletion Summary for calendar {outlook_calendar_id}:")
-    print(f"- Events deleted: {deleted_count}")
+    logger.info(f"Deletion Summary for calendar {outlook_calendar_id}:")
+    logger.info(f"- Events deleted: {deleted_count}")
     
     return synced_count, skipped_count, failed_count, deleted_count
 
-def sync_calendars(auth_handler: AuthHandler) -> bool:
-    """Main sync function that handles all calendar pairs."""
+def sync_calendars(auth_handler: AuthHandler) -> Tuple[bool, int]:
+    """Main sync function that handles all calendar pairs; returns success and the number of events synced."""
+    # Tokens are verified once per cycle; the fetch helpers below rely on it
     if not auth_handler.verify_feishu_tokens():
-        print("Feishu token verification failed")
-        return False
+        logger.warning("Feishu token verification failed")
+        return False, 0
 
     if not auth_handler.verify_outlook_token():
-        print("Outlook token verification failed")
-        return False
+        logger.warning("Outlook token verification failed")
+        return False, 0
 
     try:
         total_synced = 0
@@ -354,39 +630,50 @@ def sync_calendars(auth_handler: AuthHandler) -> bool:
         total_failed = 0
         total_deleted = 0
 
-        for pair in auth_handler.calendar_pairs:
+        # Read the configured pairs once per cycle
+        calendar_pairs = auth_handler.calendar_pairs
+
+        # Fetch every distinct Feishu and Outlook calendar up front, both sides in parallel.
+        # Writes stay sequential per pair: each Graph batch already uses the mailbox's concurrency.
+        feishu_ids = list(dict.fromkeys(pair['feishu']['id'] for pair in calendar_pairs))
+        outlook_ids = list(dict.fromkeys(pair['outlook']['id'] for pair in calendar_pairs))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            feishu_future = executor.submit(get_feishu_events_batch, auth_handler, feishu_ids)
+            outlook_future = executor.submit(get_existing_outlook_events_batch, auth_handler, outlook_ids)
+            feishu_events_by_id = feishu_future.result()
+            existing_by_outlook_id = outlook_future.result()
+
+        for pair in calendar_pairs:
             feishu_id = pair['feishu']['id']
             feishu_name = pair['feishu']['name']
             outlook_id = pair['outlook']['id']
             outlook_name = pair['outlook']['name']
 
-            print(f"\nProcessing calendar pair:")
-            print(f"Feishu: {feishu_name}")
-            print(f"Outlook: {outlook_name}")
+            logger.info(f"Processing calendar pair: {feishu_name} -> {outlook_name}")
             
-            # Get Outlook events for this specific calendar
-            outlook_events = get_outlook_events(auth_handler, outlook_id)
-            if outlook_events is None:
-                print(f"Failed to fetch Outlook events for calendar: {outlook_name}")
+            # Outlook events for this calendar, shared by every pair that targets it
+            existing_events = existing_by_outlook_id.get(outlook_id)
+            if existing_events is None:
+                logger.warning(f"Failed to fetch Outlook events for calendar: {outlook_name}")
                 continue
                 
-            print(f"Found {len(outlook_events or [])} Outlook events in {outlook_name}")
+            logger.debug(f"Found {len(existing_events)} Outlook events in {outlook_name}")
             
             # Get Feishu events
-            feishu_events = get_feishu_events(auth_handler, feishu_id)
+            feishu_events = feishu_events_by_id.get(feishu_id)
             if feishu_events is None:
-                print(f"Failed to fetch Feishu events for calendar: {feishu_name}")
+                logger.warning(f"Failed to fetch Feishu events for calendar: {feishu_name}")
                 continue
 
             # Filter future events but keep deleted ones
             future_events = filter_future_events(feishu_events)
-            print(f"Found {len(future_events)} future events in {feishu_name}")
+            logger.debug(f"Found {len(future_events)} future events in {feishu_name}")
 
             # Sync events including deletions
             synced, skipped, failed, deleted = sync_calendar_events(
                 auth_handler,
                 future_events,
-                outlook_events,
+                existing_events,
                 outlook_id
             )
             
@@ -395,79 +682,105 @@ def sync_calendars(auth_handler: AuthHandler) -> bool:
             total_failed += failed
             total_deleted += deleted
 
-        print(f"\nSync Summary:")
-        print(f"- Events synced: {total_synced}")
-        print(f"- Events skipped: {total_skipped}")
-        print(f"- Events failed: {total_failed}")
-        print(f"- Events deleted: {total_deleted}")
+        logger.info("Sync Summary:")
+        logger.info(f"- Events synced: {total_synced}")
+        logger.info(f"- Events skipped: {total_skipped}")
+        logger.info(f"- Events failed: {total_failed}")
+        logger.info(f"- Events deleted: {total_deleted}")
 
-        return True
+        return True, total_synced
     
     except Exception as e:
-        print(f"Error during sync: {e}")
-        return False
+        logger.error(f"Error during sync: {e}")
+        return False, 0
 
-def run_sync(config_path: str = 'tokens.yaml') -> bool:
-    """Run sync process with specified config file."""
+def _run_sync(config_path: str, auth_handler: Optional[AuthHandler]) -> Tuple[bool, int]:
+    """Run one sync for a config file; returns success and the number of events synced."""
     try:
-        auth_handler = AuthHandler(yaml_file=config_path)
+        if auth_handler is None:
+            auth_handler = AuthHandler(yaml_file=config_path)
         
         # Verify initial setup
         if not auth_handler.is_fully_configured():
-            print(f"Configuration incomplete for {config_path}")
-            return False
+            logger.warning(f"Configuration incomplete for {config_path}")
+            return False, 0
 
-        print(f"\nStarting sync process for {config_path}...")
+        logger.info(f"Starting sync process for {config_path}...")
         
         # Do initial sync
-        if not sync_calendars(auth_handler):
-            print("\nInitial sync failed")
-            return False
-            
-        return True
+        success, synced = sync_calendars(auth_handler)
+        if not success:
+            logger.warning("Initial sync failed")
+        return success, synced
 
     except Exception as e:
-        print(f"\nError during sync for {config_path}: {e}")
-        return False
+        logger.error(f"Error during sync for {config_path}: {e}")
+        return False, 0
+
+def run_sync(config_path: str = 'tokens.yaml', auth_handler: Optional[AuthHandler] = None) -> bool:
+    """Run sync process with specified config file."""
+    return _run_sync(config_path, auth_handler)[0]
+
+def next_sync_delay(previous: float, interval: int, success: bool, synced: int) -> float:
+    """Back off exponentially after failures and poll sooner while events are still changing."""
+    if not success:
+        # Never retry sooner than a normal cycle, even right after a short catch-up wait
+        return min(max(interval, previous) * 2, max(MAX_SYNC_DELAY, interval))
+    if synced > 0:
+        return min(MIN_SYNC_DELAY, interval)
+    return interval
 
 def run_continuous_sync(config_path: str = 'tokens.yaml', interval: int = 300) -> None:
-    """Run continuous sync process with specified interval."""
+    """Run continuous sync process with specified interval, adapted to recent results."""
     try:
-        print(f"Starting continuous sync for {config_path}")
+        logger.info(f"Starting continuous sync for {config_path}")
+        # Keep one handler so tokens are refreshed in the background between cycles
+        auth_handler = AuthHandler(yaml_file=config_path)
+        auth_handler.start_background_refresh()
+        wakeup = threading.Event()
+        with _sync_wakeups_lock:
+            _sync_wakeups.append(wakeup)
+        delay = interval
         while True:
-            success = run_sync(config_path)
+            auth_handler.reload_if_changed()
+            success, synced = _run_sync(config_path, auth_handler)
             if not success:
-                print(f"\nSync failed for {config_path}, will retry in next cycle")
+                logger.warning(f"Sync failed for {config_path}, will retry in next cycle")
             else:
-                print(f"Sync completed successfully for {config_path}")
+                logger.info(f"Sync completed successfully for {config_path}")
                 
-            print(f"\nWaiting {interval} seconds before next sync...")
-            time.sleep(interval)
+            delay = next_sync_delay(delay, interval, success, synced)
+            logger.info(f"Waiting {delay:g} seconds before next sync...")
+            if wakeup.wait(delay):
+                wakeup.clear()
+                logger.info("Sync requested, starting early")
             
     except KeyboardInterrupt:
-        print("\nSync process stopped by user")
+        logger.info("Sync process stopped by user")
         sys.exit(0)
     except Exception as e:
-        print(f"\nError during continuous sync for {config_path}: {e}")
+        logger.error(f"Error during continuous sync for {config_path}: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
+    configure_logging()
     auth_handler = AuthHandler()
     
     # Verify initial setup
     if not auth_handler.is_fully_configured():
-        print("Please run auth_handler.py first to setup authentication")
+        logger.error("Please run auth_handler.py first to setup authentication")
         sys.exit(1)
 
-    print("Starting sync process...")
+    logger.info("Starting sync process...")
+    install_sync_signal()
     
     try:
         # Run continuous sync with default config
         run_continuous_sync()
             
     except KeyboardInterrupt:
-        print("\nSync process stopped by user")
+        logger.info("Sync process stopped by user")
         sys.exit(0)
     except Exception as e:
-        print(f"\nError during sync: {e}")
+        logger.error(f"Error during sync: {e}")
         sys.exit(1)
\ No newline at end of file
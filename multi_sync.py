@@ -1,11 +1,16 @@
 import os
 import sys
 import yaml
-import time
 import threading
 from typing import Dict, List, Optional
 from dataclasses import dataclass
-from main import run_sync, run_continuous_sync
+from main import run_sync, run_continuous_sync, install_sync_signal, configure_logging
+
+# Prefer the libyaml C loader, fall back to the pure-Python implementation
+try:
+    from yaml import CSafeLoader as _LOADER
+except ImportError:
+    from yaml import SafeLoader as _LOADER
 
 @dataclass
 class SyncConfig:
@@ -31,7 +36,7 @@ class MultiSync:
                 return SyncConfig(path, name, False, "Not a YAML file")
                 
             with open(path, 'r') as file:
-                config = yaml.safe_load(file)
+                config = yaml.load(file, Loader=_LOADER)
                 
             # Validate required sections
             required_sections = ['feishu', 'outlook', 'calendar_pairs']
@@ -142,20 +147,10 @@ class MultiSync:
             self.sync_threads[config.name] = thread
             
         try:
-            # Monitor threads and report status
-            while True:
-                alive_threads = {
-                    name: thread 
-                    for name, thread in self.sync_threads.items() 
-                    if thread.is_alive()
-                }
-                
-                if not alive_threads:
-                    print("\nAll sync threads have stopped")
-                    break
-                    
-                self.sync_threads = alive_threads
-                time.sleep(60)  # Check thread status every minute
+            # Block until every sync thread has stopped; Ctrl+C still interrupts the join
+            for thread in self.sync_threads.values():
+                thread.join()
+            print("\nAll sync threads have stopped")
                 
         except KeyboardInterrupt:
             print("\nStopping all sync threads...")
@@ -166,7 +161,9 @@ def main():
     config_dir = sys.argv[1] if len(sys.argv) > 1 else 'configs'
     
     multi_sync = MultiSync(config_dir)
+    install_sync_signal()
     multi_sync.start_sync()
 
 if __name__ == "__main__":
+    configure_logging()
     main()
\ No newline at end of file